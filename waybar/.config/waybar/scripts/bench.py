@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Per-invocation cost of the waybar entry points, measured against fixtures.
+
+    bench.py                        every script in SCRIPTS, 20 runs each
+    bench.py cpu_info.py ...        only these scripts
+    bench.py --runs 50              invocations per script (after one warm-up run)
+    bench.py --gpu amd              amdgpu sysfs fixture instead of the nvidia-smi stub
+    bench.py --out FILE             save the JSON here (default: cache dir, named by git rev)
+    bench.py --compare OLD.json     also print the change against an earlier result
+
+Each script runs one-shot, the way waybar calls it on an interval, with a
+fixture /proc (SYSMON_PROC), a fixture /sys (SYSMON_SYSFS) and stub
+nvidia-smi / lspci / hyprctl first on PATH (see sysmon.fakes). The warm-up
+run builds the identity cache and state files and is not counted.
+
+Wall time is taken around each invocation; CPU time and peak RSS come from
+wait4() rusage, which includes the script's own children (nvidia-smi etc).
+Syscalls and forks come from one extra run under `strace -f` when strace is
+installed. Without it forks are counted by an audit hook and syscalls are null.
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from sysmon import fakes
+
+SCRIPTS = {
+    "cpu_info.py": [],
+    "gpu_info.py": [],
+    "net_info.py": [],
+    "sys_monitor.py": [],
+    "running_apps.py": [],
+}
+
+# Loaded into the benchmarked interpreter via PYTHONPATH when strace is missing
+FORK_COUNTER = """\
+import atexit, os, sys
+_forks = 0
+def _hook(event, args):
+    global _forks
+    if event in ("os.fork", "os.forkpty", "os.system", "subprocess.Popen"):
+        _forks += 1
+sys.addaudithook(_hook)
+def _save():
+    with open(os.environ["BENCH_FORKS"], "w") as f:
+        f.write(str(_forks))
+atexit.register(_save)
+"""
+
+# ---------------------------------------------------
+# FIXTURES
+# ---------------------------------------------------
+
+def fixture_env(root, gpu):
+    """Environment for the benchmarked scripts, with every fixture under `root`."""
+    tools = [t for t in fakes.STUBS if not (gpu == "amd" and t == "nvidia-smi")]
+    env = {k: v for k, v in os.environ.items()
+           if not k.startswith("SYSMON_") and k not in ("SWAYSOCK", "HYPRLAND_INSTANCE_SIGNATURE")}
+    env.update({
+        "SYSMON_PROC": fakes.make_proc(os.path.join(root, "proc")),
+        "SYSMON_SYSFS": fakes.make_net_sysfs(fakes.make_amd_sysfs(os.path.join(root, "sys"))),
+        # Never reach a real driver through pynvml
+        "SYSMON_NVML": "off",
+        "PATH": fakes.make_stub_bin(os.path.join(root, "bin"), tools) + os.pathsep + env.get("PATH", ""),
+        "XDG_RUNTIME_DIR": os.path.join(root, "run"),
+        "XDG_CACHE_HOME": os.path.join(root, "cache"),
+    })
+    os.makedirs(env["XDG_RUNTIME_DIR"], mode=0o700, exist_ok=True)
+    return env
+
+# ---------------------------------------------------
+# MEASUREMENT
+# ---------------------------------------------------
+
+def run_once(script, args, env):
+    """(wall_s, cpu_s, max_rss_kb) of one invocation."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, script), *args],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, cwd=HERE
+    )
+    _, _, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = 0  # already reaped
+    return wall, usage.ru_utime + usage.ru_stime, usage.ru_maxrss
+
+def count_strace(script, args, env, tmp):
+    """(syscalls, forks) of one run under strace -f; threads are not forks."""
+    log = os.path.join(tmp, "strace.log")
+    subprocess.run(
+        ["strace", "-f", "-qq", "-o", log, sys.executable, os.path.join(HERE, script), *args],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, cwd=HERE
+    )
+    syscalls = forks = 0
+    # "<pid> name(args...) = ret"; '<... name resumed>' lines continue an earlier one
+    call = re.compile(r"^\d+\s+(\w+)\(")
+    with open(log, "r", errors="replace") as f:
+        for line in f:
+            m = call.match(line)
+            if not m:
+                continue
+            syscalls += 1
+            if m.group(1) in ("clone", "clone3", "fork", "vfork") and "CLONE_THREAD" not in line:
+                forks += 1
+    return syscalls, forks
+
+def count_audit(script, args, env, tmp):
+    """(None, forks) from the audit hook; syscalls need strace."""
+    hook_dir = os.path.join(tmp, "hook")
+    os.makedirs(hook_dir, exist_ok=True)
+    with open(os.path.join(hook_dir, "sitecustomize.py"), "w") as f:
+        f.write(FORK_COUNTER)
+    out = os.path.join(tmp, "forks")
+    env = dict(env, PYTHONPATH=hook_dir, BENCH_FORKS=out)
+    subprocess.run(
+        [sys.executable, os.path.join(HERE, script), *args],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, cwd=HERE
+    )
+    try:
+        with open(out, "r") as f:
+            return None, int(f.read())
+    except (OSError, ValueError):
+        return None, None
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def bench(script, runs, env, tmp):
+    args = SCRIPTS.get(script, [])
+    run_once(script, args, env)  # warm-up: identity cache, state files
+    samples = [run_once(script, args, env) for _ in range(runs)]
+    walls = [w * 1000 for w, _, _ in samples]
+    cpus = [c * 1000 for _, c, _ in samples]
+    counter = count_strace if shutil.which("strace") else count_audit
+    syscalls, forks = counter(script, args, env, tmp)
+    return {
+        "wall_ms": {"min": min(walls), "median": percentile(walls, 50), "p95": percentile(walls, 95)},
+        "cpu_ms": {"median": percentile(cpus, 50), "p95": percentile(cpus, 95)},
+        "max_rss_kb": max(r for _, _, r in samples),
+        "syscalls": syscalls,
+        "forks": forks,
+    }
+
+# ---------------------------------------------------
+# REPORT
+# ---------------------------------------------------
+
+def git_rev():
+    try:
+        return subprocess.check_output(
+            ["git", "describe", "--always", "--dirty"], cwd=HERE, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def default_out(rev):
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "waybar-sysmon", "bench", f"{rev}.json")
+
+def flat(result):
+    """The headline numbers of one script, for printing and comparing."""
+    return {
+        "wall ms": result["wall_ms"]["median"],
+        "cpu ms": result["cpu_ms"]["median"],
+        "rss MiB": result["max_rss_kb"] / 1024,
+        "syscalls": result["syscalls"],
+        "forks": result["forks"],
+    }
+
+def cell(value):
+    if value is None:
+        return "-"
+    return str(value) if isinstance(value, int) else f"{value:.1f}"
+
+def print_table(results, old=None):
+    cols = ["wall ms", "cpu ms", "rss MiB", "syscalls", "forks"]
+    print(f"{'':<18}" + "".join(f"{c:>12}" for c in cols))
+    for script, result in results.items():
+        row = flat(result)
+        print(f"{script:<18}" + "".join(f"{cell(row[c]):>12}" for c in cols))
+        if old and script in old:
+            before = flat(old[script])
+            deltas = []
+            for c in cols:
+                if row[c] is None or before[c] is None:
+                    deltas.append("-")
+                elif before[c]:
+                    deltas.append(f"{(row[c] - before[c]) / before[c] * 100:+.0f}%")
+                else:
+                    deltas.append(f"{row[c] - before[c]:+.0f}")
+            print(f"{'  vs old':<18}" + "".join(f"{d:>12}" for d in deltas))
+
+def main():
+    args = sys.argv[1:]
+
+    def option(name, default):
+        if name in args:
+            i = args.index(name)
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        return default
+
+    runs = int(option("--runs", 20))
+    gpu = option("--gpu", "nvidia")
+    rev = git_rev()
+    out = option("--out", None) or default_out(rev)
+    compare = option("--compare", None)
+    scripts = args or list(SCRIPTS)
+
+    with tempfile.TemporaryDirectory(prefix="waybar-bench-") as tmp:
+        env = fixture_env(tmp, gpu)
+        results = {s: bench(s, runs, env, tmp) for s in scripts}
+
+    old = None
+    if compare:
+        with open(compare, "r") as f:
+            old = json.load(f)["scripts"]
+    print_table(results, old)
+
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({
+            "rev": rev,
+            "time": time.time(),
+            "python": sys.version.split()[0],
+            "runs": runs,
+            "gpu": gpu,
+            "counter": "strace" if shutil.which("strace") else "audit",
+            "scripts": results,
+        }, f, indent=2)
+    print(f"saved {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Import-time report and budget check for the waybar entry points.
+
+    check_startup.py                    report + check every script against BUDGETS_MS
+    check_startup.py cpu_info.py ...    only these scripts
+    check_startup.py --budget-ms 30     override the budget for all of them
+    check_startup.py --runs 5           best of N runs (default 3)
+
+Runs each script under `python3 -X importtime`, sums the import time of every
+module (minus what the bare interpreter loads anyway) and lists the most expensive
+modules. Exits 1 if any script is over budget, so it can sit in a pre-commit
+hook and fail when startup cost creeps up.
+"""
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Import budget per entry point (milliseconds of cumulative import time).
+# psutil alone is ~25 ms, json (via re) ~10 ms on a slow laptop.
+BUDGETS_MS = {
+    "cpu_info.py": 60,
+    "gpu_info.py": 30,
+    "net_info.py": 30,
+    "sys_monitor.py": 60,
+    "running_apps.py": 25,
+}
+
+def parse_importtime(stderr):
+    """[(self_us, cumulative_us, module), ...] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(own), int(cumulative), name.strip()))
+    return rows
+
+def interpreter_modules():
+    """Modules the bare interpreter imports anyway (site, encodings, ...)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "pass"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    return {name for _, _, name in parse_importtime(proc.stderr)}
+
+def measure(script, baseline, args=()):
+    """One run. Returns (total_us, [(cumulative_us, module), ...]) excluding baseline."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.join(HERE, script), *args],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, cwd=HERE
+    )
+    rows = []
+    seen = set(baseline)
+    # Worker threads importing the same module concurrently both report it
+    for row in parse_importtime(proc.stderr):
+        if row[2] not in seen:
+            seen.add(row[2])
+            rows.append(row)
+    # Summing self times counts every module exactly once. (Nesting depth is
+    # unreliable when threads import concurrently, so cumulative can't be used.)
+    total = sum(own for own, _, _ in rows)
+    return total, [(cumulative, name) for _, cumulative, name in rows]
+
+def report(script, runs, budget_ms, baseline):
+    best = min((measure(script, baseline) for _ in range(runs)), key=lambda r: r[0])
+    total, modules = best
+    ok = total <= budget_ms * 1000
+    print(f"{script:<18} {total / 1000:6.1f} ms  (budget {budget_ms} ms)  {'ok' if ok else 'OVER BUDGET'}")
+    for cumulative, name in sorted(modules, reverse=True)[:6]:
+        print(f"    {cumulative / 1000:6.1f} ms  {name}")
+    return ok
+
+def main():
+    args = sys.argv[1:]
+    runs = 3
+    budget = None
+    if "--runs" in args:
+        i = args.index("--runs")
+        runs = int(args[i + 1])
+        del args[i:i + 2]
+    if "--budget-ms" in args:
+        i = args.index("--budget-ms")
+        budget = float(args[i + 1])
+        del args[i:i + 2]
+
+    scripts = args or list(BUDGETS_MS)
+    baseline = interpreter_modules()
+    results = [
+        report(s, runs, budget if budget is not None else BUDGETS_MS.get(s, 60), baseline)
+        for s in scripts
+    ]
+    sys.exit(0 if all(results) else 1)
+
+if __name__ == "__main__":
+    main()
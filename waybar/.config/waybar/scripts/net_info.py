@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+import json
+import sys
+
+from sysmon.collector import Collector
+from sysmon import profile
+from sysmon.history import summary
+from sysmon.markup import escape
+from sysmon.net import human_rate, link_label
+
+WIRED_ICON = "󰈀"
+WIFI_ICON = ""
+OFFLINE_ICON = "󰖪"
+
+# Samples per tooltip sparkline
+SPARK_WIDTH = 30
+
+def name_column(name):
+    """Interface names are up to the system: cut, padded and escaped for Pango."""
+    return escape(f"{name[:12]:<12}")
+
+def render(snap):
+    """Builds the waybar JSON dict from a collector snapshot."""
+    net = snap.get("net") or {"rx": 0.0, "tx": 0.0, "interfaces": []}
+    history = snap.get("history")
+    # tun/wireguard report 'unknown' while passing traffic
+    online = [i for i in net["interfaces"] if i["state"] in ("up", "unknown")]
+
+    if not online:
+        text = f"{OFFLINE_ICON} "
+        css = "disconnected"
+    else:
+        # The icon follows the busiest physical link
+        icon = WIFI_ICON if online[0]["wireless"] else WIRED_ICON
+        text = f"{icon} ↓{human_rate(net['rx'])} ↑{human_rate(net['tx'])}"
+        css = "custom-net"
+
+    tooltip = [f"<b>Network</b> - ↓ {human_rate(net['rx'])}/s ↑ {human_rate(net['tx'])}/s"]
+    if history:
+        for label, name in (("Down", "net.rx"), ("Up", "net.tx")):
+            if history[name].values():
+                tooltip.append(f"{label:<5} {history[name].sparkline(SPARK_WIDTH)}  {summary(history[name], 'kB/s')}")
+    tooltip.append("")
+    rows = [
+        f"{name_column(i['name'])} ↓{human_rate(i['rx']):>6}/s ↑{human_rate(i['tx']):>6}/s  {link_label(i)}"
+        for i in net["interfaces"]
+    ]
+    tooltip.append(f"<tt>{chr(10).join(rows)}</tt>" if rows else "No interfaces")
+    tooltip = "\n".join(tooltip)
+    # Per-step timings with SYSMON_PROFILE / --profile
+    if snap.get("timings"):
+        tooltip += "\n\n" + "\n".join(profile.tooltip_lines(snap["timings"]))
+
+    return {"text": text, "tooltip": tooltip, "class": css}
+
+def main():
+    if "--profile" in sys.argv:
+        profile.enable()
+
+    # Ask a running sysmond first, fall back to sampling locally
+    if "--daemon" in sys.argv:
+        from sysmon import client
+        if client.relay("net", follow="--stream" in sys.argv):
+            return
+
+    if "--stream" in sys.argv:
+        from sysmon import schedule
+        # /proc/net/dev and the rtnetlink socket stay open between ticks
+        schedule.stream(("net",), render, *schedule.stream_intervals(sys.argv))
+        return
+
+    # Rates since the previous run, kept in a small state file (no sleep)
+    print(json.dumps(render(Collector(sources=("net",), state="net_info").sample())))
+
+if __name__ == "__main__":
+    main()
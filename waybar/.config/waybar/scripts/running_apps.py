@@ -1,49 +1,287 @@
 #!/usr/bin/env python3
 import json
-import subprocess
+import os
 import sys
 
+from sysmon import profile
+from sysmon.markup import escape
+
 # Define Icon Mapping (Add your apps here)
 icon_map = {
-    "firefox": "", "code": "", "terminal": "", "kitty": "",
-    "discord": "", "spotify": "", "vlc": "嗢", "thunar": "",
-    "obs": "", "rofi": ""
+    "firefox": "", "code": "", "terminal": "", "kitty": "",
+    "discord": "", "spotify": "", "vlc": "嗢", "thunar": "",
+    "obs": "", "rofi": ""
 }
 
 def get_hyprland_clients():
+    import subprocess
     try:
-        output = subprocess.check_output(["hyprctl", "clients", "-j"])
+        with profile.span("exec hyprctl"):
+            output = subprocess.check_output(["hyprctl", "clients", "-j"])
         return json.loads(output)
     except: return []
 
-# def get_sway_clients(): 
-#     # Logic for swaymsg -t get_tree if needed
-#     pass
+# ---------------------------------------------------
+# HYPRLAND IPC (resident mode)
+# ---------------------------------------------------
 
-def main():
-    clients = get_hyprland_clients()
-    unique_classes = set()
-    
-    # Filter for active workspace or all? displaying all unique running apps
-    for client in clients:
-        if client['class']:
-            unique_classes.add(client['class'].lower())
+def hypr_socket_dir():
+    """Directory holding .socket.sock (requests) and .socket2.sock (events)."""
+    sig = os.environ.get("HYPRLAND_INSTANCE_SIGNATURE", "")
+    runtime = os.environ.get("XDG_RUNTIME_DIR", "")
+    path = os.path.join(runtime, "hypr", sig)
+    # Hyprland before 0.40 kept its sockets in /tmp
+    if not os.path.exists(path):
+        path = os.path.join("/tmp", "hypr", sig)
+    return path
+
+def hypr_request(socket_dir, command):
+    """One request on .socket.sock, like `hyprctl` but without the fork."""
+    import socket
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(os.path.join(socket_dir, ".socket.sock"))
+        sock.sendall(command.encode())
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+def hypr_events(socket_dir):
+    """
+    Connects to .socket2.sock right away and returns an iterator of
+    (event, data) that ends when Hyprland closes the socket.
+    """
+    import socket
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(os.path.join(socket_dir, ".socket2.sock"))
+
+    def events():
+        with sock, sock.makefile("r", encoding="utf-8", errors="replace") as lines:
+            for line in lines:
+                event, _, data = line.rstrip("\n").partition(">>")
+                yield event, data
+    return events()
+
+def follow_hyprland(socket_dir):
+    """
+    Keeps window address -> class in memory, updated from openwindow /
+    closewindow events, and yields the class set whenever it changes.
+    Nothing runs while the window layout is idle.
+    """
+    # Subscribe first so no event is lost between the snapshot and the stream
+    events = hypr_events(socket_dir)
+    windows = {c["address"]: c["class"] for c in json.loads(hypr_request(socket_dir, "j/clients"))}
+    classes = current_classes(windows)
+    yield classes
+
+    for event, data in events:
+        if event == "openwindow":
+            # ADDRESS,WORKSPACE,CLASS,TITLE (title may contain commas)
+            parts = data.split(",", 3)
+            if len(parts) >= 3:
+                windows["0x" + parts[0]] = parts[2]
+        elif event == "closewindow":
+            windows.pop("0x" + data, None)
+        else:
+            continue
+
+        new = current_classes(windows)
+        if new != classes:
+            classes = new
+            yield classes
+
+def current_classes(windows):
+    return {c.lower() for c in windows.values() if c}
+
+# ---------------------------------------------------
+# SWAY IPC (i3-ipc protocol)
+# ---------------------------------------------------
+# Frame: "i3-ipc" <payload length u32> <type u32> <json payload>, native endian
+I3_MAGIC = b"i3-ipc"
+I3_SUBSCRIBE = 2
+I3_GET_TREE = 4
+I3_EVENT_WINDOW = 0x80000003
+
+def i3_connect(path):
+    import socket
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    return sock
+
+def i3_send(sock, msg_type, payload=b""):
+    import struct
+    sock.sendall(I3_MAGIC + struct.pack("=II", len(payload), msg_type) + payload)
+
+def i3_recv(sock):
+    """Returns (type, decoded payload) of the next message or event."""
+    import struct
+
+    def exactly(n):
+        buf = b""
+        while len(buf) < n:
+            chunk = sock.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("sway closed the IPC socket")
+            buf += chunk
+        return buf
+
+    length, msg_type = struct.unpack("=II", exactly(14)[len(I3_MAGIC):])
+    return msg_type, json.loads(exactly(length))
+
+def sway_window_class(con):
+    """app_id for native Wayland windows, X11 class for Xwayland ones."""
+    return con.get("app_id") or (con.get("window_properties") or {}).get("class")
 
+def sway_windows(node, windows=None):
+    """Walks a get_tree reply once: container id -> class for every window."""
+    if windows is None:
+        windows = {}
+    if node.get("type") in ("con", "floating_con") and not node.get("nodes"):
+        cls = sway_window_class(node)
+        if cls:
+            windows[node["id"]] = cls
+    for child in node.get("nodes", []) + node.get("floating_nodes", []):
+        sway_windows(child, windows)
+    return windows
+
+def get_sway_clients(path):
+    """One GET_TREE over the socket, no swaymsg fork."""
+    with i3_connect(path) as sock:
+        i3_send(sock, I3_GET_TREE)
+        _, tree = i3_recv(sock)
+    return [{"class": cls} for cls in sway_windows(tree).values()]
+
+def follow_sway(path):
+    """
+    One connection subscribed to window events; the tree is walked only
+    once at startup, after that each new/close event updates the map.
+    Yields the class set whenever it changes.
+    """
+    # Subscribe first so no window is missed between the tree and the stream
+    events = i3_connect(path)
+    i3_send(events, I3_SUBSCRIBE, b'["window"]')
+    msg_type, reply = i3_recv(events)
+    if msg_type != I3_SUBSCRIBE or not reply.get("success"):
+        raise ConnectionError("sway refused the window subscription")
+
+    with i3_connect(path) as sock:
+        i3_send(sock, I3_GET_TREE)
+        _, tree = i3_recv(sock)
+    windows = sway_windows(tree)
+    classes = current_classes(windows)
+    yield classes
+
+    with events:
+        while True:
+            msg_type, event = i3_recv(events)
+            if msg_type != I3_EVENT_WINDOW:
+                continue
+            con = event.get("container", {})
+            change = event.get("change")
+            if change == "new":
+                windows[con.get("id")] = sway_window_class(con)
+            elif change == "close":
+                windows.pop(con.get("id"), None)
+            elif change == "title" and con.get("id") in windows:
+                # Some clients only set app_id after mapping
+                windows[con["id"]] = sway_window_class(con)
+            else:
+                continue
+
+            new = current_classes(windows)
+            if new != classes:
+                classes = new
+                yield classes
+
+# ---------------------------------------------------
+# BACKEND SELECTION
+# ---------------------------------------------------
+
+def detect_backend():
+    """sway when $SWAYSOCK is set, hyprland when its signature is, else None."""
+    if os.environ.get("SWAYSOCK"):
+        return "sway"
+    if os.environ.get("HYPRLAND_INSTANCE_SIGNATURE"):
+        return "hyprland"
+    return None
+
+# ---------------------------------------------------
+# OUTPUT
+# ---------------------------------------------------
+
+def render(unique_classes, timings=None):
     icons = []
     tooltip = []
 
-    for app in unique_classes:
+    for app in sorted(unique_classes):
         # Default icon if not found
-        icon = icon_map.get(app, "") 
+        icon = icon_map.get(app, "")
         icons.append(icon)
-        tooltip.append(app)
+        # Window classes are whatever the app sets: escape them for Pango
+        tooltip.append(escape(app))
 
-    output = {
+    lines = ["Running: " + ", ".join(tooltip)]
+    # Per-call timings with SYSMON_PROFILE / --profile
+    if timings:
+        lines += [""] + profile.tooltip_lines(timings)
+
+    return {
         "text": " ".join(icons),
-        "tooltip": "Running: " + ", ".join(tooltip),
+        "tooltip": "\n".join(lines),
         "class": "custom-running-apps"
     }
-    print(json.dumps(output))
+
+def main():
+    if "--profile" in sys.argv:
+        profile.enable()
+    backend = detect_backend()
+    if "--backend" in sys.argv:
+        backend = sys.argv[sys.argv.index("--backend") + 1]
+    # Forced sway outside a sway session: say so instead of a KeyError
+    if backend == "sway" and not os.environ.get("SWAYSOCK"):
+        print(json.dumps({"text": "", "tooltip": "sway IPC: $SWAYSOCK is not set"}), flush=True)
+        sys.exit(1)
+
+    # Resident mode: one JSON line per change of the running app set.
+    # Mocks: SWAYSOCK=<path> with sysmon.fakes.FakeSway, or
+    # --socket-dir <dir> with sysmon.fakes.FakeHyprland
+    if "--stream" in sys.argv:
+        if backend == "sway":
+            changes = follow_sway(os.environ["SWAYSOCK"])
+        else:
+            socket_dir = hypr_socket_dir()
+            if "--socket-dir" in sys.argv:
+                socket_dir = sys.argv[sys.argv.index("--socket-dir") + 1]
+            changes = follow_hyprland(socket_dir)
+        try:
+            for classes in changes:
+                print(json.dumps(render(classes)), flush=True)
+        except (KeyboardInterrupt, BrokenPipeError):
+            pass
+        except OSError as e:
+            print(json.dumps({"text": "", "tooltip": f"{backend} IPC: {e}"}), flush=True)
+            sys.exit(1)
+        return
+
+    if backend == "sway":
+        try:
+            with profile.span("sway get_tree"):
+                clients = get_sway_clients(os.environ["SWAYSOCK"])
+        except OSError:
+            clients = []
+    else:
+        clients = get_hyprland_clients()
+    unique_classes = set()
+
+    # Filter for active workspace or all? displaying all unique running apps
+    for client in clients:
+        if client['class']:
+            unique_classes.add(client['class'].lower())
+
+    print(json.dumps(render(unique_classes, profile.take() if profile.enabled else None)))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Behaviour checks for the backends, driven by the stand-ins in sysmon.fakes
+(no GPU, compositor or running daemon needed).
+
+    selfcheck.py                    run every check
+    selfcheck.py nvml render ...    only these checks
+
+Each check runs a fake through the real backend code and compares what
+comes out with what the fake was built with, so a fake that drifts from
+the interface it stands in for fails here. Exits 1 if any check fails,
+so it can sit in a pre-commit hook next to check_startup.py.
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+# name -> check function, in the order they run
+CHECKS = {}
+
+def check(name):
+    def register(fn):
+        CHECKS[name] = fn
+        return fn
+    return register
+
+class CheckFailed(Exception):
+    pass
+
+def expect(what, got, want):
+    if got != want:
+        raise CheckFailed(f"{what}: got {got!r}, want {want!r}")
+
+@contextmanager
+def deadline(seconds):
+    """Fails a check that blocks (e.g. waiting on an event that never comes)."""
+    import signal
+
+    def expired(*_):
+        raise CheckFailed(f"no result within {seconds} s")
+    old = signal.signal(signal.SIGALRM, expired)
+    signal.alarm(seconds)
+    try:
+        yield
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, old)
+
+@contextmanager
+def env(**values):
+    """Sets environment variables for the duration of a check."""
+    saved = {k: os.environ.get(k) for k in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+# ---------------------------------------------------
+# CHECKS
+# ---------------------------------------------------
+
+@check("nvml")
+def check_nvml():
+    """NvmlBackend over FakeNvml: one session, every device, per-device process memory."""
+    from sysmon.fakes import FakeNvml
+    from sysmon.gpu import NvmlBackend, open_nvidia
+    lib = FakeNvml(count=2)
+    backend = NvmlBackend(lib)
+    expect("session open", lib.initialised, True)
+    expect("describe", backend.describe(), [{"vendor": "nvidia", "name": lib.name}] * 2)
+
+    cards = backend.sample()
+    expect("card ids", [c["id"] for c in cards], ["nvidia0", "nvidia1"])
+    # FakeNvml moves per utilization read: 7% usage, 1 °C, 12.5 W each
+    first = cards[0]
+    expect("name", first["name"], lib.name)
+    expect("usage", first["usage"], 7)
+    expect("temp", first["temp"], 41)
+    expect("power (W)", first["power"], 27.5)
+    expect("max clock", first["freq_m"], lib.max_sm)
+    expect("second card usage", cards[1]["usage"], 14)
+    # This process is on both devices' graphics lists: counted once per device
+    expect("process memory", backend.process_memory(), {os.getpid(): 2 * 512 * 1024 ** 2})
+    backend.close()
+    expect("session closed", lib.initialised, False)
+
+    # Laptop GeForce: no power reading, the card still shows (0 W, like '[N/A]')
+    backend = NvmlBackend(FakeNvml(unsupported=("nvmlDeviceGetPowerUsage",)))
+    cards = backend.sample()
+    expect("unsupported power: cards", [(c["id"], c["power"]) for c in cards], [("nvidia0", 0.0)])
+    expect("unsupported power: usage still read", cards[0]["usage"], 7)
+    backend.close()
+    # Only a card that fell off the bus is dropped
+    backend = NvmlBackend(FakeNvml(count=2, lost=(0,)))
+    expect("lost card dropped", [c["id"] for c in backend.sample()], ["nvidia1"])
+    backend.close()
+
+    with env(SYSMON_NVML="fake"):
+        expect("SYSMON_NVML=fake backend", type(open_nvidia()).__name__, "NvmlBackend")
+
+@check("amd")
+def check_amd():
+    """amdgpu sysfs fixture: probe, name, every metric, and re-reads through the kept fds."""
+    from sysmon import fakes
+    from sysmon.gpu import DRM_VENDORS, AmdSysfsReader, drm_cards
+    with tempfile.TemporaryDirectory() as root, env(SYSMON_SYSFS=root):
+        fakes.make_amd_sysfs(root, name="AMD Radeon 780M", busy=37, temp_c=52, power_w=18.5, sclk_mhz=1800)
+        cards = drm_cards()
+        # card1-eDP-1 is a connector and must be skipped
+        expect("drm cards", [(os.path.basename(p), v) for p, v in cards], [("card1", "0x1002")])
+        expect("vendor routing", DRM_VENDORS.get(cards[0][1]), AmdSysfsReader)
+
+        reader = AmdSysfsReader.open(cards[0][0])
+        [card] = reader.sample()
+        expect("name", card["name"], "AMD Radeon 780M")
+        expect("usage", card["usage"], 37)
+        expect("temp", card["temp"], 52)
+        expect("power (W)", card["power"], 18.5)
+        # No freq1_input in the fixture: current clock from the starred DPM level
+        expect("clock", card["freq_c"], 1800)
+        expect("max clock", card["freq_m"], 2700)
+
+        # The files stay open: a new value must show without reopening
+        fakes.write_file(os.path.join(cards[0][0], "device", "gpu_busy_percent"), "81\n")
+        expect("usage after update", reader.sample()[0]["usage"], 81)
+        reader.close()
+
+def render_snapshot(interface, device):
+    """Smallest snapshot sys_monitor renders: one thread, no GPU, one net interface, / on `device`."""
+    # Each device reads at its own rate, so the I/O row tells them apart
+    read_bps = {"nvme0n1p2": 1e6, "sda2": 5e6}[device]
+    return {
+        "time": 0.0, "stale": [],
+        "cpu": {"name": "Test CPU", "usages": [10.0], "usage": 10.0, "freq_c": 2400, "freq_m": 4800,
+                "temp": 50, "temps": [50], "dies": []},
+        "gpu": None,
+        "mem": {"used": 4e9, "total": 16e9, "percent": 25.0, "swap_used": 0, "swap_total": 0, "swap_percent": 0,
+                "psi_cpu": None, "psi_memory": None, "psi_memory_full": None, "psi_io": None,
+                "zram": None, "zswap": None},
+        "storage": {"entries": [
+            {"name": "Root ( / )", "total": 1.0, "used": 0.5, "percent": 50.0, "temp": None, "stale": False,
+             "device": device, "read_bps": read_bps, "write_bps": 0, "iops": 10, "latency_ms": 0.5, "util": 1},
+        ], "used": 0.5, "total": 1.0, "percent": 50.0},
+        "procs": {"cpu": [], "rss": [], "gpu": []},
+        "net": {"rx": 1e6, "tx": 0.0, "interfaces": [
+            {"name": interface, "rx": 1e6, "tx": 0.0, "state": "up", "speed": None, "wireless": False},
+        ]},
+    }
+
+@check("render")
+def check_render():
+    """sys_monitor's Renderer: a row switching back to an earlier (cached) one must show."""
+    from sys_monitor import Renderer
+    # The net row, then the I/O row behind one mount, go A -> B -> A: the
+    # third render formats nothing new, yet must not repeat the second
+    for what, ticks in (
+        ("net", [("eth0", "nvme0n1p2"), ("wlan0", "nvme0n1p2"), ("eth0", "nvme0n1p2")]),
+        ("disk", [("eth0", "nvme0n1p2"), ("eth0", "sda2"), ("eth0", "nvme0n1p2")]),
+    ):
+        renderer = Renderer()
+        for tick, (interface, device) in enumerate(ticks):
+            tooltip = renderer.render(render_snapshot(interface, device))["tooltip"]
+            expect(f"{what} tick {tick}: interface", [n for n in ("eth0", "wlan0") if n in tooltip], [interface])
+            rate = {"nvme0n1p2": "1.0M/s", "sda2": "5.0M/s"}[device]
+            expect(f"{what} tick {tick}: {device} I/O row", f"Root ( / )   | {rate}" in tooltip, True)
+        # Nothing moved: the previous dict comes back as is
+        again = renderer.render(render_snapshot(*ticks[-1]))
+        expect(f"{what}: unchanged render reused", again is renderer.last["output"], True)
+
+@check("markup")
+def check_markup():
+    """Names the system supplies (comm, mount, interface, GPU) come out as valid Pango markup."""
+    import xml.etree.ElementTree as ET
+    import net_info
+    from sys_monitor import Renderer
+    evil = "<i>&amp"
+    snap = render_snapshot("eth0", "sda2")
+    snap["net"]["interfaces"][0]["name"] = evil
+    snap["storage"]["entries"][0]["name"] = evil
+    snap["procs"] = {"cpu": [{"name": evil, "cpu": 99.0}], "rss": [{"name": evil, "rss": 1e9}], "gpu": []}
+    snap["gpu"] = {"id": "nvidia0", "name": evil, "usage": 5, "temp": 40, "power": 10.0, "freq_c": 900, "freq_m": 0,
+                   "cards": [{"id": "nvidia0", "name": evil, "usage": 5, "temp": 40, "power": 10.0},
+                             {"id": "nvidia1", "name": evil, "usage": 6, "temp": 41, "power": 11.0}]}
+    for what, out in (("sys_monitor", Renderer().render(snap)), ("net_info", net_info.render(snap))):
+        try:
+            # Pango markup is XML without a root element
+            root = ET.fromstring(f"<markup>{out['tooltip']}</markup>")
+        except ET.ParseError as e:
+            raise CheckFailed(f"{what}: tooltip is not valid markup ({e})")
+        # ... and the name still reads as itself once parsed
+        expect(f"{what}: name shown", evil in "".join(root.itertext()), True)
+
+@check("alerts")
+def check_alerts():
+    """A broken alerts.json costs the bad rules (or falls back to the defaults), never the daemon."""
+    import contextlib
+    import io
+    import json
+    from sysmon.alerts import DEFAULT_RULES, AlertEngine
+    good = {"name": "hot", "metric": "cpu.temp", "above": 80}
+    with tempfile.TemporaryDirectory() as config, env(XDG_CONFIG_HOME=config):
+        os.makedirs(os.path.join(config, "waybar"))
+        for what, content, want in (
+            ("missing keys", [{"metric": "cpu.temp"}, good], ["hot"]),
+            ("not a rule", [1, "cpu.temp", good], ["hot"]),
+            ("bad number", [dict(good, name="x", above="hot"), good], ["hot"]),
+            ("not a list", {"a": 1}, [r["name"] for r in DEFAULT_RULES]),
+        ):
+            with open(os.path.join(config, "waybar", "alerts.json"), "w") as f:
+                json.dump(content, f)
+            with contextlib.redirect_stderr(io.StringIO()):
+                engine = AlertEngine(notify=lambda *_: None)
+            expect(f"{what}: rules kept", [r.name for r in engine.rules], want)
+
+@check("sway")
+def check_sway():
+    """running_apps' i3-ipc client against FakeSway: GET_TREE, then window events."""
+    import running_apps
+    from sysmon.fakes import FakeSway
+    with tempfile.TemporaryDirectory() as tmp, deadline(5):
+        sway = FakeSway(os.path.join(tmp, "sway-ipc.sock"))
+        try:
+            sway.open_window("firefox")
+            xterm = sway.open_window("x11:XTerm")
+            # Xwayland windows are listed by their X11 class
+            clients = running_apps.get_sway_clients(sway.path)
+            expect("get_tree windows", sorted(c["class"] for c in clients), ["XTerm", "firefox"])
+
+            changes = running_apps.follow_sway(sway.path)
+            expect("initial classes", next(changes), {"firefox", "xterm"})
+            kitty = sway.open_window("kitty")
+            expect("after new", next(changes), {"firefox", "xterm", "kitty"})
+            sway.close_window(xterm)
+            expect("after close", next(changes), {"firefox", "kitty"})
+            sway.close_window(kitty)
+            expect("after second close", next(changes), {"firefox"})
+            changes.close()
+        finally:
+            sway.close()
+
+# ---------------------------------------------------
+# MAIN
+# ---------------------------------------------------
+
+def main():
+    names = sys.argv[1:] or list(CHECKS)
+    unknown = [n for n in names if n not in CHECKS]
+    if unknown:
+        print(f"selfcheck: unknown check(s) {', '.join(unknown)}; have {', '.join(CHECKS)}", file=sys.stderr)
+        sys.exit(2)
+
+    failed = 0
+    for name in names:
+        try:
+            CHECKS[name]()
+            print(f"{name:<10} ok")
+        except Exception as e:
+            failed += 1
+            detail = str(e) if isinstance(e, CheckFailed) else f"{type(e).__name__}: {e}"
+            print(f"{name:<10} FAILED  {detail}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
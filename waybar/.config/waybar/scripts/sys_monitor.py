@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 import json
-import psutil
-import subprocess
-import re
-import os
-import platform
-import glob
+import sys
+
+from sysmon.collector import Collector
+from sysmon.cpu import short_name
+from sysmon import profile
+from sysmon.history import summary
+from sysmon.markup import Cells, ColorScale, escape
+from sysmon.net import human_rate, link_label
 
 # ---------------------------------------------------
 # CONFIGURATION & ICONS
@@ -15,6 +17,7 @@ GPU_ICON = "GPU"
 MEM_ICON = ""
 SSD_ICON = ""
 HDD_ICON = "󰋊"
+NET_ICON = "󰈀"
 
 # Catppuccin / Pastel Colors
 PINK = "#f5c2e7"
@@ -24,315 +27,315 @@ COLOR_MID = "#f9e2af"      # Yellow
 COLOR_MID_HIGH = "#fab387" # Orange
 COLOR_HIGH = "#f38ba8"     # Red
 COLOR_CRIT = "#ff0000"     # Bright Red
+COLOR_STALE = "#777777"    # Grey, value is from an earlier tick
+
+# Samples per tooltip sparkline
+SPARK_WIDTH = 24
+# Rows in the top-processes table
+TOP_ROWS = 5
+# Die temperatures per tooltip line
+DIES_PER_LINE = 4
+# Interfaces in the network table, busiest first
+NET_ROWS = 3
+
+def human_bytes(n):
+    """1.2G / 340M style, for the narrow process columns."""
+    for unit, size in (("G", 1e9), ("M", 1e6), ("K", 1e3)):
+        if n >= size:
+            return f"{n / size:.1f}{unit}" if n < size * 10 else f"{n / size:.0f}{unit}"
+    return f"{n}B"
+
+# Scale adjustment: Temps usually go to 90, Usage to 100
+TEMP_COLORS = ColorScale([(45, COLOR_LOW), (60, COLOR_MID_LOW), (75, COLOR_MID), (85, COLOR_MID_HIGH)], COLOR_HIGH)
+LOAD_COLORS = ColorScale([(30, COLOR_LOW), (50, COLOR_MID_LOW), (70, COLOR_MID), (85, COLOR_MID_HIGH)], COLOR_HIGH)
+# PSI stall %: a few percent is already felt, a quarter of the time is thrashing
+PSI_COLORS = ColorScale([(1, COLOR_LOW), (5, COLOR_MID_LOW), (10, COLOR_MID), (25, COLOR_MID_HIGH)], COLOR_HIGH)
+
+def name_column(name, width):
+    """A name from the system cut and padded to `width`, then escaped for Pango."""
+    return escape(f"{name[:width]:<{width}}")
+
+def link_color(iface):
+    """Link column: load colors by share of the link speed while up, red when down."""
+    if iface["state"] in ("up", "unknown"):
+        # tun/wireguard report 'unknown' while passing traffic
+        if not iface.get("speed"):
+            return COLOR_LOW
+        return LOAD_COLORS(max(iface["rx"], iface["tx"]) * 8 / (iface["speed"] * 1e6) * 100)
+    return COLOR_HIGH
 
 def get_color(value, is_temp=False):
     """Returns a hex color code based on value intensity."""
-    if value is None: return "#ffffff"
-    try:
-        val = float(value)
-    except:
-        return "#ffffff"
-    
-    # Scale adjustment: Temps usually go to 90, Usage to 100
-    if is_temp:
-        if val < 45: return COLOR_LOW
-        if val < 60: return COLOR_MID_LOW
-        if val < 75: return COLOR_MID
-        if val < 85: return COLOR_MID_HIGH
-        return COLOR_HIGH
-    else:
-        if val < 30: return COLOR_LOW
-        if val < 50: return COLOR_MID_LOW
-        if val < 70: return COLOR_MID
-        if val < 85: return COLOR_MID_HIGH
-        return COLOR_HIGH
+    return TEMP_COLORS(value) if is_temp else LOAD_COLORS(value)
 
 # ---------------------------------------------------
-# DATA COLLECTION
+# TEMPLATES
 # ---------------------------------------------------
+# Static lines are built once; the rest are str.format templates whose
+# arguments are the values at display precision (see Renderer.cells).
+# Name columns arrive padded and escaped (markup.escape), so no width here
 
-def get_cpu_info():
-    """Fetches CPU Name, Usage, Freq, and Temp."""
-    # 1. Name
-    cpu_name = "Unknown CPU"
-    try:
-        if platform.system() == "Linux":
-            with open("/proc/cpuinfo", "r") as f:
-                for line in f:
-                    if "model name" in line:
-                        cpu_name = line.split(":")[1].strip()
-                        # Clean up name for display
-                        cpu_name = cpu_name.replace("(R)", "").replace("(TM)", "").split("@")[0].strip()
-                        break
-    except: pass
-
-    # 2. Stats
-    usage = psutil.cpu_percent(interval=0.1)
-    
-    # 3. Frequency
-    freq_curr = 0
-    freq_max = 0
-    try:
-        freq = psutil.cpu_freq()
-        if freq:
-            freq_curr = freq.current
-            freq_max = freq.max
-    except: pass
-
-    # 4. Temp (Best effort for Linux)
-    temp = 0
-    try:
-        temps = psutil.sensors_temperatures()
-        # Common labels for CPU temp packages
-        for key in ['k10temp', 'coretemp', 'zenpower', 'asus']:
-            if key in temps:
-                # usually Tctl or Package id 0 is the main one
-                temp = temps[key][0].current
-                break
-    except: pass
-
-    return {
-        "name": cpu_name,
-        "usage": usage,
-        "freq_c": freq_curr,
-        "freq_m": freq_max,
-        "temp": temp
-    }
-
-def get_nvidia_info():
-    """Fetches Nvidia GPU info via nvidia-smi."""
-    try:
-        # Get Name
-        name_out = subprocess.check_output(["nvidia-smi", "--query-gpu=name", "--format=csv,noheader,nounits"], text=True)
-        gpu_name = name_out.strip()
-
-        # Get Stats
-        stats_out = subprocess.check_output(
-            ["nvidia-smi", "--query-gpu=utilization.gpu,temperature.gpu,power.draw,clocks.gr,clocks.max.sm", "--format=csv,noheader,nounits"],
-            text=True
-        )
-        match = re.search(r"(\d+)\s*,\s*(\d+)\s*,\s*([\d\.]+)\s*,\s*(\d+)\s*,\s*(\d+)", stats_out)
-        
-        if match:
-            return {
-                "name": gpu_name,
-                "usage": int(match.group(1)),
-                "temp": int(match.group(2)),
-                "power": float(match.group(3)),
-                "freq_c": int(match.group(4)),
-                "freq_m": int(match.group(5))
-            }
-    except:
-        return None
-    return None
-
-def get_amd_info():
-    """Fetches AMD iGPU/dGPU info via sysfs and lspci."""
-    info = {
-        "name": "AMD Radeon Graphics",
-        "usage": 0,
-        "temp": 0,
-        "power": 0,
-        "freq_c": 0,
-        "freq_m": 0
-    }
-    
-    found = False
-    card_path = ""
-    
-    # 1. Identify AMD Card in /sys/class/drm/
-    try:
-        for path in glob.glob("/sys/class/drm/card*"):
-            # Check vendor ID (0x1002 is AMD)
-            vendor_file = os.path.join(path, "device/vendor")
-            if os.path.exists(vendor_file):
-                with open(vendor_file, "r") as f:
-                    if "0x1002" in f.read().lower():
-                        card_path = path
-                        found = True
-                        break
-    except: pass
-
-    if not found:
-        return None
-
-    # 2. Get Name via lspci (Cleanest way to get 'Radeon 780M' etc)
-    try:
-        lspci_out = subprocess.check_output("lspci -mm | grep -i 'vga\\|3d' | grep -i 'amd\\|ati'", shell=True, text=True).strip()
-        # Format usually: 04:00.0 "VGA compatible controller" "Brand" "Device Name"
-        # We try to grab the last quoted string or the device name
-        if lspci_out:
-            parts = lspci_out.split('"')
-            # The device name is usually in the 4th or 6th slot depending on output
-            if len(parts) >= 6:
-                info["name"] = parts[5] if parts[5].strip() else parts[3]
-            elif len(parts) >= 4:
-                info["name"] = parts[3]
-    except: 
-        pass # Keep default name
-
-    # 3. Usage (gpu_busy_percent)
-    try:
-        busy_path = os.path.join(card_path, "device", "gpu_busy_percent")
-        if os.path.exists(busy_path):
-            with open(busy_path, "r") as f:
-                info["usage"] = int(f.read().strip())
-    except: pass
-
-    # 4. Temperature & Power (hwmon)
-    try:
-        hwmon_dir = os.path.join(card_path, "device", "hwmon", "hwmon*")
-        hwmons = glob.glob(hwmon_dir)
-        if hwmons:
-            hm = hwmons[0]
-            
-            # Temp
-            tpath = os.path.join(hm, "temp1_input") # Edge temp
-            if os.path.exists(tpath):
-                with open(tpath, "r") as f:
-                    info["temp"] = int(f.read().strip()) // 1000
-            
-            # Power (microWatts -> Watts)
-            ppath = os.path.join(hm, "power1_average")
-            if os.path.exists(ppath):
-                with open(ppath, "r") as f:
-                    info["power"] = float(f.read().strip()) / 1000000.0
-
-            # Frequency (clk)
-            # Try freq1_input first
-            fpath = os.path.join(hm, "freq1_input")
-            if os.path.exists(fpath):
-                with open(fpath, "r") as f:
-                     info["freq_c"] = int(f.read().strip()) // 1000000 # Hz to MHz
-    except: pass
-    
-    # Fallback for Freq if hwmon failed: pp_dpm_sclk
-    if info["freq_c"] == 0:
-        try:
-            sclk_path = os.path.join(card_path, "device", "pp_dpm_sclk")
-            if os.path.exists(sclk_path):
-                with open(sclk_path, "r") as f:
-                    content = f.read()
-                    # format: 0: 400Mhz \n 1: 1200Mhz *
-                    match = re.search(r"(\d+)Mhz\s*\*", content)
-                    if match:
-                        info["freq_c"] = int(match.group(1))
-        except: pass
-
-    return info
-
-def get_storage_info():
-    """Scans mounted partitions excluding loops and snaps."""
-    entries = []
-    # Partitions to ignore
-    exclude_types = ['squashfs', 'tracefs', 'overlay', 'tmpfs', 'devtmpfs']
-    exclude_mounts = ['/boot', '/boot/efi', '/run', '/dev']
-
-    total_cap = 0
-    total_used = 0
-    
-    for part in psutil.disk_partitions():
-        if part.fstype in exclude_types or any(part.mountpoint.startswith(x) for x in exclude_mounts):
-            continue
-        
-        # Determine Name (Root, Home, or folder name)
-        name = "Data"
-        if part.mountpoint == "/": name = "Root ( / )"
-        elif part.mountpoint == "/home": name = "Home"
-        else: name = os.path.basename(part.mountpoint).capitalize()
-
-        try:
-            usage = psutil.disk_usage(part.mountpoint)
-            
-            # Convert to TB/GB logic TB: 1e12 GB: 1e9
-            total_tb = usage.total / 1e9
-            used_tb = usage.used / 1e9
-            
-            total_cap += total_tb
-            total_used += used_tb
-            
-            entries.append({
-                "name": name,
-                "total": total_tb,
-                "used": used_tb,
-                "percent": usage.percent,
-                "temp": None
-            })
-        except: pass
-    
-    overall_percent = (total_used / total_cap * 100) if total_cap > 0 else 0
-    return entries, total_used, total_cap, overall_percent
+RULE = "─" * 30
+STALE_MARK = f" <span foreground='{COLOR_STALE}'>(stale)</span>"
+
+BAR = (
+    "<span foreground='{0}'>" + CPU_ICON + " {1}°C</span>  "
+    "<span foreground='{2}'>" + GPU_ICON + " {3}%</span>  "
+    "<span foreground='{4}'>" + MEM_ICON + " {5:.1f}G</span>  "
+    "<span foreground='{6}'>" + SSD_ICON + " {7:.1f}GiB</span>"
+)
+
+CPU_HEAD = f"<span foreground='{PINK}'>{CPU_ICON} CPU: {{0}}</span>{{1}}"
+CPU_USAGE = "  Usage: <span foreground='{0}'>{1}%</span> | {2}°C"
+CPU_FREQ = "  Freq:  {0}MHz / {1}MHz"
+DIE = "{0} <span foreground='{1}'>{2}°C</span>"
+
+GPU_HEAD = f"<span foreground='{PINK}'>{GPU_ICON} GPU: {{0}}</span> {{1}}"
+GPU_NONE = f"<span foreground='{PINK}'>{GPU_ICON} GPU: Not Found</span>{{0}}"
+GPU_USAGE = "  Usage: <span foreground='{0}'>{1}%</span> | Power: {2:.1f}W"
+GPU_TEMP = "  Temp:  <span foreground='{0}'>{1}°C</span> | Freq: {2}"
+GPU_CARD = "  {0} <span foreground='{1}'>{2}%</span> | <span foreground='{3}'>{4}°C</span> | {5:.1f}W"
+
+MEM_HEAD = f"<span foreground='{PINK}'>{MEM_ICON} MEMORY SYSTEM</span>{{0}}"
+MEM_COLUMNS = "<tt>Type    | Used    | Total   | Util</tt>"
+MEM_ROW = "<tt>{0:<7} | {1:4.1f} GB | {2:4.1f} GB | <span foreground='{3}'>{4}%</span></tt>"
+PSI_ROW = ("  Stall: CPU <span foreground='{0}'>{1:.1f}%</span> | Mem <span foreground='{2}'>{3:.1f}%</span>"
+           " (full <span foreground='{4}'>{5:.1f}%</span>) | IO <span foreground='{6}'>{7:.1f}%</span>")
+ZRAM_ROW = "  zram:  {0} in {1} ({2:.1f}x)"
+ZSWAP_ROW = "  zswap: {0} in {1} ({2:.1f}x)"
+
+DISK_HEAD = f"<span foreground='{PINK}'>{SSD_ICON} STORAGE ({{0}}%)</span>{{1}}"
+DISK_COLUMNS = "<tt>Drive        | Used   | Free   | Util</tt>"
+DISK_ROW = "<tt>{0} | {1:<4.1f} T | {2:<4.1f} T | <span foreground='{3}'>{4:>2}%</span></tt>"
+DISK_IO_COLUMNS = "<tt>Drive        | Read   | Write  | IOPS  | Lat    | Temp</tt>"
+DISK_IO_ROW = "<tt>{0} | {1:>6} | {2:>6} | {3:>5} | {4:>4.1f}ms | {5}</tt>"
+DISK_TEMP = "<span foreground='{0}'>{1}°C</span>"
+
+NET_HEAD = f"<span foreground='{PINK}'>{NET_ICON} NETWORK</span> ↓ {{0}}/s ↑ {{1}}/s{{2}}"
+NET_COLUMNS = "<tt>Iface        | Down     | Up       | Link</tt>"
+NET_ROW = "<tt>{0} | {1:>6}/s | {2:>6}/s | <span foreground='{3}'>{4}</span></tt>"
+
+PROCS_HEAD = f"<span foreground='{PINK}'>TOP PROCESSES</span>{{0}}"
+PROCS_COLUMNS = f"<tt>{'CPU':<17} | {'RAM':<17} | GPU mem</tt>"
+PROCS_ROW = "<tt>{0:<17} | {1:<17} | {2}</tt>"
+
+TREND = "  {0:<6} <tt>{1:<" + str(SPARK_WIDTH) + "}</tt> {2}"
 
 # ---------------------------------------------------
 # BUILD OUTPUT
 # ---------------------------------------------------
-cpu = get_cpu_info()
-
-# Try Nvidia first, then AMD
-gpu = get_nvidia_info()
-if not gpu:
-    gpu = get_amd_info()
-
-storage, tot_used, tot_cap, tot_per = get_storage_info()
-mem = psutil.virtual_memory()
-swap = psutil.swap_memory()
-
-# 1. JSON TEXT (The Bar Display)
-bar_text = (
-    f"<span foreground='{get_color(cpu['temp'], True)}'>{CPU_ICON} {cpu['temp']:.0f}°C</span>  "
-    f"<span foreground='{get_color(gpu['temp'], True) if gpu else '#777'}'>{GPU_ICON} {gpu['usage'] if gpu and gpu['usage'] > 0 else 'N/A'}%</span>  "
-    f"<span foreground='{get_color(mem.percent)}'>{MEM_ICON} {mem.used/1e9:.1f}G</span>  "
-    f"<span foreground='{get_color(tot_per)}'>{SSD_ICON} {tot_used:.1f}GiB</span>"
-)
 
-# 2. TOOLTIP (The Popup)
-tt = []
-
-# --- CPU ---
-tt.append(f"<span foreground='{PINK}'>{CPU_ICON} CPU: {cpu['name']}</span>")
-tt.append(f"  Usage: <span foreground='{get_color(cpu['usage'])}'>{cpu['usage']}%</span> | {cpu['temp']:.0f}°C")
-tt.append(f"  Freq:  {cpu['freq_c']:.0f}MHz / {cpu['freq_m']:.0f}MHz")
-tt.append("─" * 30)
-
-# --- GPU ---
-if gpu:
-    tt.append(f"<span foreground='{PINK}'>{GPU_ICON} GPU: {gpu['name']}</span> ")
-    tt.append(f"  Usage: <span foreground='{get_color(gpu['usage'])}'>{gpu['usage']}%</span> | Power: {gpu['power']:.1f}W")
-    
-    # Formatting for Frequency (Integrated often reports 0 max freq)
-    freq_str = f"{gpu['freq_c']}MHz"
-    if gpu['freq_m'] > 0:
-        freq_str += f" / {gpu['freq_m']}MHz"
-        
-    tt.append(f"  Temp:  <span foreground='{get_color(gpu['temp'], True)}'>{gpu['temp']}°C</span> | Freq: {freq_str}")
-else:
-    tt.append(f"<span foreground='{PINK}'>{GPU_ICON} GPU: Not Found</span>")
-tt.append("─" * 30)
-
-# --- MEMORY ---
-tt.append(f"<span foreground='{PINK}'>{MEM_ICON} MEMORY SYSTEM</span>")
-tt.append(f"<tt>Type    | Used    | Total   | Util</tt>")
-tt.append(f"<tt>RAM     | {mem.used/1e9:4.1f} GB | {mem.total/1e9:4.1f} GB | <span foreground='{get_color(mem.percent)}'>{mem.percent}%</span></tt>")
-tt.append(f"<tt>Swap    | {swap.used/1e9:4.1f} GB | {swap.total/1e9:4.1f} GB | <span foreground='{get_color(swap.percent)}'>{swap.percent}%</span></tt>")
-tt.append("─" * 30)
-
-# --- STORAGE ---
-tt.append(f"<span foreground='{PINK}'>{SSD_ICON} STORAGE ({tot_per:.0f}%)</span>")
-tt.append(f"<tt>Drive        | Used   | Free   | Util</tt>")
-for disk in storage:
-    d_name = (disk['name'][:10] + '..') if len(disk['name']) > 10 else disk['name']
-    
-    tt.append(
-        f"<tt>{d_name:<12} | "
-        f"{disk['used']:<4.1f} T | "
-        f"{(disk['total'] - disk['used']):<4.1f} T | "
-        f"<span foreground='{get_color(disk['percent'])}'>{disk['percent']:>2.0f}%</span></tt>"
-    )
-
-# PRINT JSON
-print(json.dumps({
-    "text": bar_text,
-    "tooltip": "\n".join(tt),
-    "class": "custom-sysmon",
-    "alt": "sysmon"
-}))
+class Renderer:
+    """
+    Builds the waybar dict from collector snapshots, reusing whatever did not
+    visibly change: every value cell is re-formatted only when its value at
+    display precision (the rounding the tooltip shows) differs from the last
+    tick, and when the tooltip comes out line for line the same the previous
+    dict is returned as is. (Comparing lines, not "did any cell change":
+    a row switching back to one cached earlier reformats nothing.)
+    Resident callers (sysmond) get the savings; a one-shot run renders once.
+    """
+
+    def __init__(self):
+        self.cells = Cells()
+        self.last = None
+
+    def trend(self, history, label, name, unit="%", percent=True):
+        """Sparkline + min/avg/max line from the rolling history (None without one)."""
+        if not history or not history[name].values():
+            return None
+        lo_hi = (0, 100) if percent else (None, None)
+        spark = history[name].sparkline(SPARK_WIDTH, *lo_hi)
+        return self.cells(f"trend.{name}", TREND, label, spark, summary(history[name], unit))
+
+    def render(self, snap):
+        cell = self.cells
+        cpu = snap["cpu"]
+        gpu = snap["gpu"]
+        mem = snap["mem"]
+        storage = snap["storage"]["entries"]
+        tot_used = snap["storage"]["used"]
+        tot_per = snap["storage"]["percent"]
+        stale = snap.get("stale", [])
+        history = snap.get("history")
+
+        def add(line):
+            if line:
+                tt.append(line)
+
+        def mark(source):
+            """Suffix for section headers whose source missed its deadline."""
+            return STALE_MARK if source in stale else ""
+
+        # 1. JSON TEXT (The Bar Display)
+        cpu_temp = round(cpu['temp'])
+        gpu_usage = gpu['usage'] if gpu and gpu['usage'] > 0 else 'N/A'
+        bar_text = cell(
+            "bar", BAR,
+            TEMP_COLORS(cpu['temp']), cpu_temp,
+            TEMP_COLORS(gpu['temp']) if gpu else '#777', gpu_usage,
+            LOAD_COLORS(mem['percent']), round(mem['used'] / 1e9, 1),
+            LOAD_COLORS(tot_per), round(tot_used, 1),
+        )
+
+        # 2. TOOLTIP (The Popup)
+        tt = []
+
+        # --- CPU ---
+        tt.append(cell("cpu.head", CPU_HEAD, escape(short_name(cpu['name'])), mark('cpu')))
+        tt.append(cell("cpu.usage", CPU_USAGE, LOAD_COLORS(cpu['usage']), cpu['usage'], cpu_temp))
+        tt.append(cell("cpu.freq", CPU_FREQ, round(cpu['freq_c']), round(cpu['freq_m'])))
+        # Per-CCD / per-socket sensors, a few to a line (EPYC has up to 12 CCDs)
+        dies = cpu.get("dies", [])
+        for i in range(0, len(dies), DIES_PER_LINE):
+            cells = [cell(f"die.{i + j}", DIE, escape(d['label']), TEMP_COLORS(d['temp']), round(d['temp']))
+                     for j, d in enumerate(dies[i:i + DIES_PER_LINE])]
+            tt.append(("  Dies:  " if i == 0 else "         ") + "  ".join(cells))
+        add(self.trend(history, "Load", "cpu"))
+        add(self.trend(history, "Temp", "cpu.temp", "°C", percent=False))
+        tt.append(RULE)
+
+        # --- GPU ---
+        if gpu:
+            tt.append(cell("gpu.head", GPU_HEAD, escape(gpu['name']), mark('gpu')))
+            tt.append(cell("gpu.usage", GPU_USAGE, LOAD_COLORS(gpu['usage']), gpu['usage'], round(gpu['power'], 1)))
+
+            # Formatting for Frequency (Integrated often reports 0 max freq)
+            freq_str = f"{gpu['freq_c']}MHz"
+            if gpu['freq_m'] > 0:
+                freq_str += f" / {gpu['freq_m']}MHz"
+
+            tt.append(cell("gpu.temp", GPU_TEMP, TEMP_COLORS(gpu['temp']), gpu['temp'], freq_str))
+            add(self.trend(history, "Load", "gpu"))
+            add(self.trend(history, "Power", "gpu.power", "W", percent=False))
+            # The other cards, one line each (the busiest one is shown above)
+            for card in gpu.get("cards", []):
+                if card["id"] == gpu["id"]:
+                    continue
+                tt.append(cell(
+                    f"gpu.{card['id']}", GPU_CARD, name_column(short_name(card['name']), 18),
+                    LOAD_COLORS(card['usage']), card['usage'],
+                    TEMP_COLORS(card['temp']), card['temp'], round(card['power'], 1),
+                ))
+        else:
+            tt.append(cell("gpu.head", GPU_NONE, mark('gpu')))
+        tt.append(RULE)
+
+        # --- MEMORY ---
+        tt.append(cell("mem.head", MEM_HEAD, mark('mem')))
+        tt.append(MEM_COLUMNS)
+        tt.append(cell("mem.ram", MEM_ROW, "RAM", round(mem['used'] / 1e9, 1), round(mem['total'] / 1e9, 1),
+                       LOAD_COLORS(mem['percent']), mem['percent']))
+        tt.append(cell("mem.swap", MEM_ROW, "Swap", round(mem['swap_used'] / 1e9, 1), round(mem['swap_total'] / 1e9, 1),
+                       LOAD_COLORS(mem['swap_percent']), mem['swap_percent']))
+        # Stall shares (PSI avg10): how much time tasks actually waited
+        if mem.get('psi_memory') is not None:
+            psi = [mem.get(k) or 0.0 for k in ('psi_cpu', 'psi_memory', 'psi_memory_full', 'psi_io')]
+            tt.append(cell("mem.psi", PSI_ROW, *(x for v in psi for x in (PSI_COLORS(v), round(v, 1)))))
+        # Compressed swap: original data in the RAM it really takes
+        zram = mem.get('zram')
+        if zram and zram['orig']:
+            tt.append(cell("mem.zram", ZRAM_ROW, human_bytes(zram['orig']), human_bytes(zram['used']),
+                           round(zram['orig'] / max(zram['used'], 1), 1)))
+        zswap = mem.get('zswap')
+        if zswap:
+            tt.append(cell("mem.zswap", ZSWAP_ROW, human_bytes(zswap['stored']), human_bytes(zswap['pool']),
+                           round(zswap['stored'] / max(zswap['pool'], 1), 1)))
+        add(self.trend(history, "RAM", "ram"))
+        add(self.trend(history, "Swap", "swap"))
+        tt.append(RULE)
+
+        # --- STORAGE ---
+        tt.append(cell("disk.head", DISK_HEAD, round(tot_per), mark('storage')))
+        tt.append(DISK_COLUMNS)
+        for i, disk in enumerate(storage):
+            d_name = (disk['name'][:10] + '..') if len(disk['name']) > 10 else disk['name']
+            # Mounts whose statvfs timed out show their last usage in grey
+            d_color = COLOR_STALE if disk.get('stale') else LOAD_COLORS(disk['percent'])
+            tt.append(cell(f"disk.{i}", DISK_ROW, escape(f"{d_name:<12}"), round(disk['used'], 1),
+                           round(disk['total'] - disk['used'], 1), d_color, round(disk['percent'])))
+        # I/O per block device (mounts sharing one, like btrfs subvolumes, show once)
+        seen = set()
+        io_rows = []
+        for disk in storage:
+            device = disk.get('device')
+            if disk.get('read_bps') is None or device in seen:
+                continue
+            seen.add(device)
+            d_name = (disk['name'][:10] + '..') if len(disk['name']) > 10 else disk['name']
+            temp = DISK_TEMP.format(TEMP_COLORS(disk['temp']), round(disk['temp'])) if disk['temp'] is not None else "--"
+            io_rows.append(cell(f"disk.io.{device}", DISK_IO_ROW, escape(f"{d_name:<12}"),
+                                human_bytes(int(round(disk['read_bps'], -3))) + "/s",
+                                human_bytes(int(round(disk['write_bps'], -3))) + "/s",
+                                round(disk['iops']), round(disk['latency_ms'], 1), temp))
+        if io_rows:
+            tt.append("")
+            tt.append(DISK_IO_COLUMNS)
+            tt.extend(io_rows)
+
+        # --- NETWORK ---
+        net = snap.get("net")
+        if net and net["interfaces"]:
+            tt.append(RULE)
+            tt.append(cell("net.head", NET_HEAD, human_rate(net['rx']), human_rate(net['tx']), mark('net')))
+            tt.append(NET_COLUMNS)
+            for iface in net["interfaces"][:NET_ROWS]:
+                n_name = (iface['name'][:10] + '..') if len(iface['name']) > 10 else iface['name']
+                tt.append(cell(f"net.{iface['name']}", NET_ROW, escape(f"{n_name:<12}"), human_rate(iface['rx']),
+                               human_rate(iface['tx']), link_color(iface), link_label(iface)))
+            add(self.trend(history, "Down", "net.rx", "kB/s", percent=False))
+            add(self.trend(history, "Up", "net.tx", "kB/s", percent=False))
+
+        # --- TOP PROCESSES ---
+        procs = snap.get("procs")
+        if procs and (procs["cpu"] or procs["rss"]):
+            tt.append(RULE)
+            tt.append(cell("procs.head", PROCS_HEAD, mark('procs')))
+            tt.append(PROCS_COLUMNS)
+            columns = [
+                [f"{name_column(p['name'], 10)} {p['cpu']:>5.1f}%" for p in procs["cpu"]],
+                [f"{name_column(p['name'], 10)} {human_bytes(p['rss']):>6}" for p in procs["rss"]],
+                [f"{name_column(p['name'], 10)} {human_bytes(p['gpu_mem']):>6}" for p in procs["gpu"]],
+            ]
+            for i in range(min(TOP_ROWS, max(len(c) for c in columns))):
+                tt.append(cell(f"procs.{i}", PROCS_ROW, *(c[i] if i < len(c) else "" for c in columns)))
+
+        # --- TIMINGS (SYSMON_PROFILE / --profile) ---
+        if snap.get("timings"):
+            tt.append(RULE)
+            tt.extend(profile.tooltip_lines(snap["timings"]))
+
+        # Same lines as last tick (cached cells are the same objects, so
+        # this is mostly identity checks): keep the old dict
+        if self.last is not None and self.last["text"] == bar_text and self.last["lines"] == tt:
+            return self.last["output"]
+        output = {
+            "text": bar_text,
+            "tooltip": "\n".join(tt),
+            "class": "custom-sysmon",
+            "alt": "sysmon"
+        }
+        self.last = {"output": output, "text": bar_text, "lines": tt}
+        return output
+
+renderer = Renderer()
+
+def render(snap):
+    """Builds the waybar JSON dict from a collector snapshot."""
+    return renderer.render(snap)
+
+def main():
+    if "--profile" in sys.argv:
+        profile.enable()
+
+    # Ask a running sysmond first, fall back to sampling locally
+    if "--daemon" in sys.argv:
+        from sysmon import client
+        if client.relay("sysmon", follow="--stream" in sys.argv):
+            return
+
+    # PRINT JSON
+    print(json.dumps(render(Collector(state="sys_monitor", ring=True).sample())))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Shared sampling code for the waybar scripts (cpu_info, gpu_info, sys_monitor).
+Each source lives in its own module; collector.py ties them into one snapshot.
+
+Modules import heavy dependencies (psutil, subprocess, glob, re) inside the
+functions that need them, so each waybar entry point only pays for the
+code path it actually runs. Keep it that way when adding sources.
+"""
+import os
+
+def sysfs_root():
+    """/sys, or a fixture tree given by SYSMON_SYSFS (see sysmon.fakes)."""
+    return os.environ.get("SYSMON_SYSFS", "/sys")
+
+def proc_root():
+    """/proc, or a fixture tree given by SYSMON_PROC (see sysmon.fakes)."""
+    return os.environ.get("SYSMON_PROC", "/proc")
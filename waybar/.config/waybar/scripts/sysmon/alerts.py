@@ -0,0 +1,166 @@
+"""
+Threshold alerts evaluated against the snapshots the collector already
+produces, so alerting never samples anything on its own.
+
+A rule fires once its metric has stayed at or above `above` for `for`
+seconds, and clears only after it drops to `clear` or below. The gap
+between the two (hysteresis) plus the hold time keeps jitter around a
+threshold from producing a stream of notifications.
+
+Rules come from $XDG_CONFIG_HOME/waybar/alerts.json when present, a list of:
+
+    {"name": "cpu-temp", "metric": "cpu.temp", "above": 85, "clear": 75,
+     "for": 10, "urgency": "critical", "label": "CPU temperature", "unit": "°C"}
+
+`metric` is "<source>.<field>" of a snapshot: cpu.temp, cpu.usage,
+gpu.temp, gpu.usage, gpu.power, mem.percent, mem.swap_percent,
+mem.psi_cpu / psi_memory / psi_memory_full / psi_io (PSI avg10 %),
+storage.percent, net.rx / net.tx (bytes/s). Notifications go through notify-send (mako), app name
+"sysmon".
+"""
+import json
+import os
+import sys
+import time
+
+APP_NAME = "sysmon"
+
+# Same bands as get_color in sys_monitor.py: fire in the red band,
+# clear once back in the yellow one
+DEFAULT_RULES = [
+    {"name": "cpu-temp", "metric": "cpu.temp", "above": 85, "clear": 75, "for": 10,
+     "urgency": "critical", "label": "CPU temperature", "unit": "°C"},
+    {"name": "gpu-temp", "metric": "gpu.temp", "above": 85, "clear": 75, "for": 10,
+     "urgency": "critical", "label": "GPU temperature", "unit": "°C"},
+    {"name": "cpu-usage", "metric": "cpu.usage", "above": 85, "clear": 70, "for": 60,
+     "urgency": "normal", "label": "CPU usage", "unit": "%"},
+    {"name": "mem", "metric": "mem.percent", "above": 85, "clear": 70, "for": 30,
+     "urgency": "normal", "label": "Memory", "unit": "%"},
+    {"name": "storage", "metric": "storage.percent", "above": 85, "clear": 80, "for": 0,
+     "urgency": "normal", "label": "Storage", "unit": "%"},
+    # All tasks stalled on memory a tenth of the time: thrashing, not just full
+    {"name": "mem-pressure", "metric": "mem.psi_memory_full", "above": 10, "clear": 2, "for": 10,
+     "urgency": "critical", "label": "Memory pressure", "unit": "% stalled"},
+]
+
+def config_path():
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(base, "waybar", "alerts.json")
+
+def load_rules(path=None):
+    """Rules from the config file, or DEFAULT_RULES when there is none."""
+    path = path or config_path()
+    try:
+        with open(path, "r") as f:
+            specs = json.load(f)
+    except FileNotFoundError:
+        specs = DEFAULT_RULES
+    except (OSError, ValueError) as e:
+        print(f"sysmon alerts: ignoring {path}: {e}", file=sys.stderr)
+        specs = DEFAULT_RULES
+    if not isinstance(specs, list):
+        print(f"sysmon alerts: ignoring {path}: expected a list of rules", file=sys.stderr)
+        specs = DEFAULT_RULES
+    # A typo in one rule drops that rule, never the daemon
+    rules = []
+    for i, spec in enumerate(specs):
+        try:
+            rules.append(Rule(spec))
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            print(f"sysmon alerts: skipping rule {i + 1} in {path}: {e}", file=sys.stderr)
+    return rules
+
+def notify_send(summary, body, urgency):
+    """Fire-and-forget notify-send; the sample loop never waits on it."""
+    import subprocess
+    try:
+        subprocess.Popen(
+            ["notify-send", "-a", APP_NAME, "-u", urgency, summary, body],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+    except OSError as e:
+        print(f"sysmon alerts: {summary}: {body} (notify-send: {e})", file=sys.stderr)
+
+# ---------------------------------------------------
+# RULES
+# ---------------------------------------------------
+
+class Rule:
+    """One threshold with hysteresis; `feed` returns "fire", "clear" or None."""
+
+    # Keys a spec must have; the rest default
+    REQUIRED = ("name", "metric", "above")
+
+    def __init__(self, spec):
+        if not isinstance(spec, dict):
+            raise TypeError(f"expected an object, got {type(spec).__name__}")
+        missing = [key for key in self.REQUIRED if key not in spec]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+        self.name = spec["name"]
+        self.source, _, self.field = spec["metric"].partition(".")
+        self.above = float(spec["above"])
+        self.clear = float(spec.get("clear", self.above))
+        self.hold = float(spec.get("for", 0))
+        self.urgency = spec.get("urgency", "normal")
+        self.label = spec.get("label", spec["metric"])
+        self.unit = spec.get("unit", "")
+        self.firing = False
+        # When the metric first went over `above` (None while below)
+        self.since = None
+
+    def value(self, snap):
+        """The rule's metric, or None if the source is missing or stale."""
+        if self.source in snap.get("stale", []):
+            return None
+        data = snap.get(self.source)
+        if not data:
+            return None
+        return data.get(self.field)
+
+    def feed(self, value, now):
+        if value is None:
+            # No reading says nothing either way; only forget a pending trip
+            self.since = None
+            return None
+        if self.firing:
+            if value <= self.clear:
+                self.firing = False
+                self.since = None
+                return "clear"
+            return None
+        if value < self.above:
+            self.since = None
+            return None
+        if self.since is None:
+            self.since = now
+        if now - self.since >= self.hold:
+            self.firing = True
+            return "fire"
+        return None
+
+class AlertEngine:
+    """Feeds every snapshot through the rules and notifies on transitions."""
+
+    def __init__(self, rules=None, notify=notify_send):
+        self.rules = load_rules() if rules is None else rules
+        self.notify = notify
+
+    def feed(self, snap):
+        now = time.monotonic()
+        for rule in self.rules:
+            value = rule.value(snap)
+            change = rule.feed(value, now)
+            if change == "fire":
+                held = f" for {rule.hold:.0f} s" if rule.hold else ""
+                self.notify(
+                    f"{rule.label} {value:.0f}{rule.unit}",
+                    f"Above {rule.above:.0f}{rule.unit}{held}",
+                    rule.urgency,
+                )
+            elif change == "clear":
+                self.notify(
+                    f"{rule.label} back to {value:.0f}{rule.unit}",
+                    f"Below {rule.clear:.0f}{rule.unit} again",
+                    "low",
+                )
@@ -0,0 +1,87 @@
+"""
+Client side of sysmond. Kept apart from the server so `--daemon` runs
+only import socket, not socketserver/threading.
+"""
+import os
+import socket
+import sys
+
+# ---------------------------------------------------
+# SOCKET LOCATION & PROTOCOL
+# ---------------------------------------------------
+# One request line per connection:
+#   get <module>    -> latest rendered JSON line, then close
+#   watch <module>  -> latest line, then one line per tick until disconnect
+
+def socket_path():
+    """
+    waybar-sysmon.sock in $XDG_RUNTIME_DIR, else in the owner-checked 0700
+    directory cpu.runtime_dir() falls back to. Never a bare /tmp name:
+    another user could bind it first and feed the bar their own output.
+    """
+    from sysmon.cpu import runtime_dir
+    return os.path.join(runtime_dir(), "waybar-sysmon.sock")
+
+# ---------------------------------------------------
+# RELAY
+# ---------------------------------------------------
+
+# Watching: seconds between reconnect attempts after the daemon went away
+# (e.g. while it restarts), and how many before the caller samples locally
+RECONNECT_DELAY = 1.0
+RECONNECT_TRIES = 5
+
+def relay_once(module, follow, path):
+    """One connection's lines to stdout. Returns how many, or None without a daemon."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path or socket_path())
+    except OSError:
+        sock.close()
+        return None
+
+    count = 0
+    with sock:
+        try:
+            sock.sendall(f"{'watch' if follow else 'get'} {module}\n".encode())
+            lines = sock.makefile("r")
+        except OSError:
+            return 0
+        while True:
+            try:
+                line = lines.readline()
+            except OSError:
+                break  # daemon died mid-line
+            if not line:
+                break
+            # BrokenPipeError here is our stdout (waybar gone), for the caller
+            sys.stdout.write(line)
+            sys.stdout.flush()
+            count += 1
+    return count
+
+def relay(module, follow=False, path=None):
+    """
+    Copies a module's JSON line(s) from the daemon to stdout. Returns True
+    once a reply was relayed, or a watch was ended from our side (Ctrl-C,
+    waybar closing the pipe). Returns False if no daemon answered, so the
+    caller can sample locally: straight away at the start, and when a watched
+    daemon goes away and does not come back within RECONNECT_TRIES attempts.
+    """
+    import time
+    relayed = False
+    tries = 0
+    while True:
+        try:
+            count = relay_once(module, follow, path)
+        except (KeyboardInterrupt, BrokenPipeError):
+            return True
+        if count:
+            relayed = True
+            tries = 0
+            if not follow:
+                return True
+        if not follow or not relayed or tries >= RECONNECT_TRIES:
+            return False
+        tries += 1
+        time.sleep(RECONNECT_DELAY)
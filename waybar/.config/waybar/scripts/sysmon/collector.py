@@ -0,0 +1,189 @@
+import time
+
+from sysmon import cpu as cpu_src
+from sysmon import proc_root
+from sysmon import profile
+from sysmon.identity import load_identity
+
+ALL_SOURCES = ("cpu", "gpu", "mem", "storage", "procs", "net")
+
+# Seconds (from the start of a tick) each source gets before its last
+# known value is shown instead. Keeps the bar within a fixed latency budget
+# when nvidia-smi is slow or a network mount hangs in statvfs.
+DEADLINES = {"cpu": 0.5, "gpu": 1.0, "mem": 0.5, "storage": 1.0, "procs": 1.0, "net": 0.5}
+
+class Collector:
+    """
+    Samples each source once per tick into a shared snapshot dict.
+    Static data (names, sysfs paths) comes from the identity cache;
+    CPU usage is the /proc/stat delta since the previous sample.
+    Sources run concurrently; one that misses its deadline keeps its last
+    value and is listed in snap["stale"].
+    """
+
+    def __init__(self, sources=ALL_SOURCES, resident=False, interval=2.0, state=None, deadlines=None, ring=False):
+        self.sources = sources
+        self.deadlines = dict(DEADLINES, **(deadlines or {}))
+        self.last = {}
+        self.workers = None
+        self.storage = None
+        self.procs = None
+        self.pressure = None
+        self.net = None
+        self.procs_state = cpu_src.state_path(f"{state}.procs") if state else None
+        self.storage_state = cpu_src.state_path(f"{state}.diskstats") if state else None
+        self.net_state = cpu_src.state_path(f"{state}.netdev") if state else None
+        # One-shot runs name a state file so usage spans the refresh interval
+        self.cpu = cpu_src.CpuSampler(cpu_src.state_path(f"{state}.cpustat") if state else None)
+        # psutil reads /proc through a module global: point it at the fixture
+        # once, before any worker thread is inside psutil
+        if "cpu" in sources or "mem" in sources:
+            import psutil
+            psutil.PROCFS_PATH = proc_root()
+        # Static names and paths, one file read per process (rebuilt per boot)
+        self.identity = load_identity()
+        self.cpu_name = self.identity["cpu_name"]
+        # Thread -> sensor map from the identity cache; no sensors reads as 0 °C
+        self.thermal = None
+        if "cpu" in sources and self.identity.get("cpu_sensors"):
+            from sysmon.topology import ThermalReader
+            self.thermal = ThermalReader(self.identity["cpu_sensors"])
+        # Rolling history for the sparklines: in memory when resident,
+        # mapped from a small file when one-shot runs name a state
+        self.history = None
+        if resident or state:
+            from sysmon.history import History, metric_names
+            names = metric_names(self.identity["threads"])
+            if resident:
+                self.history = History(names)
+            else:
+                self.history = History.mapped(cpu_src.state_path(f"{state}.history"), names)
+        # Binary ring of every snapshot for other consumers (sysmon.ring)
+        self.ring = None
+        if ring:
+            from sysmon.ring import RingWriter
+            try:
+                self.ring = RingWriter()
+            except OSError:
+                pass
+        # Resident collectors may keep long-lived backends (nvidia-smi --loop-ms)
+        self.gpu = None
+        if "gpu" in sources:
+            from sysmon.gpu import GpuMonitor
+            self.gpu = GpuMonitor(resident, interval, self.identity, state)
+
+    def sample_cpu(self):
+        with profile.span("cpu.stat"):
+            usages = self.cpu.sample()
+        with profile.span("cpu.freq"):
+            freq_c, freq_m = cpu_src.get_cpu_freq()
+        with profile.span("cpu.sensors"):
+            if self.thermal:
+                temp, temps, dies = self.thermal.sample(len(usages))
+            else:
+                temp, temps, dies = 0, [0] * len(usages), []
+        return {
+            "name": self.cpu_name,
+            "usages": usages,
+            "usage": round(sum(usages) / len(usages), 1) if usages else 0.0,
+            "freq_c": freq_c,
+            "freq_m": freq_m,
+            "temp": temp,
+            "temps": temps,
+            "dies": dies,
+        }
+
+    def sample_mem(self):
+        import psutil
+        mem = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        if self.pressure is None:
+            from sysmon.pressure import PressureReader
+            self.pressure = PressureReader()
+        with profile.span("mem.pressure"):
+            pressure = self.pressure.sample()
+        return dict({
+            "used": mem.used, "total": mem.total, "percent": mem.percent,
+            "swap_used": swap.used, "swap_total": swap.total, "swap_percent": swap.percent,
+        }, **pressure)
+
+    def sample_storage(self):
+        if self.storage is None:
+            from sysmon.storage import StorageMonitor
+            self.storage = StorageMonitor(state_path=self.storage_state)
+        entries, used, cap, percent = self.storage.sample()
+        return {"entries": entries, "used": used, "total": cap, "percent": percent}
+
+    def sample_gpu(self):
+        return self.gpu.sample()
+
+    def sample_procs(self):
+        if self.procs is None:
+            from sysmon.procs import ProcessTable
+            self.procs = ProcessTable(self.procs_state)
+        # NVML knows per-process GPU memory; without it the table reads DRM fdinfo
+        return self.procs.sample(self.gpu.process_memory() if self.gpu else None)
+
+    def sample_net(self):
+        if self.net is None:
+            from sysmon.net import NetMonitor
+            self.net = NetMonitor(self.net_state)
+        return self.net.sample()
+
+    def placeholder(self, name):
+        """What a source shows if it has never produced a value."""
+        if name == "cpu":
+            return {"name": self.cpu_name, "usages": [], "usage": 0.0,
+                    "freq_c": 0, "freq_m": 0, "temp": 0, "temps": [], "dies": []}
+        if name == "mem":
+            return {"used": 0, "total": 0, "percent": 0,
+                    "swap_used": 0, "swap_total": 0, "swap_percent": 0,
+                    "psi_cpu": None, "psi_memory": None, "psi_memory_full": None, "psi_io": None,
+                    "zram": None, "zswap": None}
+        if name == "storage":
+            return {"entries": [], "used": 0, "total": 0, "percent": 0}
+        if name == "procs":
+            return {"cpu": [], "rss": [], "gpu": []}
+        if name == "net":
+            return {"rx": 0.0, "tx": 0.0, "interfaces": []}
+        return None
+
+    def sample(self):
+        """Returns one snapshot containing every configured source."""
+        snap = {"time": time.time(), "stale": []}
+
+        # A single source gains nothing from a thread
+        if len(self.sources) == 1:
+            name = self.sources[0]
+            with profile.span(name):
+                snap[name] = getattr(self, f"sample_{name}")()
+        else:
+            self.sample_concurrently(snap)
+
+        if self.history is not None:
+            self.history.record(snap)
+            snap["history"] = self.history
+        if self.ring is not None:
+            self.ring.append(snap)
+        # Opt-in per-source timings (SYSMON_PROFILE / --profile)
+        if profile.enabled:
+            snap["timings"] = profile.take()
+        return snap
+
+    def sample_concurrently(self, snap):
+        if self.workers is None:
+            from sysmon.workers import SourceWorker
+            self.workers = {
+                name: SourceWorker(name, profile.timed(name, getattr(self, f"sample_{name}")))
+                for name in self.sources
+            }
+
+        start = time.monotonic()
+        for worker in self.workers.values():
+            worker.kick()
+        for name, worker in self.workers.items():
+            if worker.wait(start + self.deadlines[name] - time.monotonic()) and worker.error is None:
+                self.last[name] = worker.result
+            else:
+                snap["stale"].append(name)
+            snap[name] = self.last[name] if name in self.last else self.placeholder(name)
@@ -0,0 +1,189 @@
+import os
+
+from sysmon import proc_root
+
+# ---------------------------------------------------
+# NAME
+# ---------------------------------------------------
+
+def get_cpu_name():
+    """Reads the CPU model name from /proc/cpuinfo for Linux."""
+    try:
+        with open(os.path.join(proc_root(), "cpuinfo"), "r") as f:
+            for line in f:
+                if "model name" in line:
+                    return line.split(":")[1].strip()
+    except: pass
+    import platform
+    return platform.processor() or "Unknown CPU"
+
+def short_name(cpu_name):
+    """Clean up name for display (drops (R)/(TM) and the '@ x GHz' suffix)."""
+    return cpu_name.replace("(R)", "").replace("(TM)", "").split("@")[0].strip()
+
+# ---------------------------------------------------
+# USAGE (/proc/stat)
+# ---------------------------------------------------
+
+def read_cpu_times():
+    """
+    Reads per-CPU jiffy counters from /proc/stat.
+    Returns: A list of (busy, total) tuples, one per logical CPU.
+    """
+    times = []
+    with open(os.path.join(proc_root(), "stat"), "r") as f:
+        for line in f:
+            # 'cpu ' is the aggregate line, 'cpuN' are the threads
+            if not line.startswith("cpu"):
+                break
+            if line.startswith("cpu "):
+                continue
+            fields = [int(x) for x in line.split()[1:]]
+            # idle + iowait count as not busy
+            idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+            total = sum(fields[:8])
+            times.append((total - idle, total))
+    return times
+
+def usage_between(prev, curr):
+    """Per-CPU usage percentages from two read_cpu_times() samples."""
+    usages = []
+    for (b0, t0), (b1, t1) in zip(prev, curr):
+        dt = t1 - t0
+        usages.append(100.0 * (b1 - b0) / dt if dt > 0 else 0.0)
+    return usages
+
+def runtime_dir():
+    """
+    $XDG_RUNTIME_DIR, else /tmp/waybar-sysmon-<uid> created 0700. The /tmp
+    name is predictable, so it is only used if it is a real directory that
+    we own and nobody else can enter; otherwise (someone else got there
+    first) state goes under $XDG_CACHE_HOME instead.
+    """
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return runtime
+    import stat
+    path = f"/tmp/waybar-sysmon-{os.getuid()}"
+    try:
+        os.mkdir(path, 0o700)
+    except OSError:
+        pass  # already there (checked below) or /tmp not writable
+    try:
+        st = os.lstat(path)
+        if stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077:
+            return path
+    except OSError:
+        pass
+    return os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+
+def state_path(name):
+    """Where one-shot consumers keep state between runs (tmpfs, per user)."""
+    return os.path.join(runtime_dir(), "waybar-sysmon", name)
+
+class StateFile:
+    """
+    A one-shot run's counters for the next run. Bars on different outputs
+    each get their own file (waybar sets WAYBAR_OUTPUT_NAME for custom
+    modules), else each would take its delta over the few ms since the
+    other's run. load() takes an flock that save() drops, so runs for the
+    same output take turns; save() replaces the file in one rename.
+    """
+
+    def __init__(self, path):
+        output = os.environ.get("WAYBAR_OUTPUT_NAME")
+        self.path = f"{path}@{output}" if output else path
+        self.lock_fd = None
+
+    def lock(self):
+        if self.lock_fd is not None:
+            return
+        import fcntl
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # A lock file of its own: os.replace gives the state a new inode each run
+            fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            return  # unlocked state still beats none
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        self.lock_fd = fd
+
+    def unlock(self):
+        if self.lock_fd is not None:
+            os.close(self.lock_fd)  # drops the flock
+            self.lock_fd = None
+
+    def load(self):
+        """The previous run's bytes (None without one); holds the lock until save()."""
+        self.lock()
+        try:
+            with open(self.path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def save(self, data):
+        """Replaces the state with `data` and releases the lock."""
+        self.lock()
+        try:
+            tmp = f"{self.path}.{os.getpid()}"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+        finally:
+            self.unlock()
+
+class CpuSampler:
+    """
+    Non-blocking usage sampler: usage is the delta since the previous call.
+    Resident processes keep the previous counters in memory; one-shot runs
+    pass a state_path and the counters survive between invocations, so the
+    sample covers the whole refresh interval without sleeping.
+    With no usable previous sample the result is the average since boot.
+    """
+
+    def __init__(self, state_path=None):
+        self.state = StateFile(state_path) if state_path else None
+        self.prev = None
+
+    def load(self):
+        data = self.state.load()
+        try:
+            return [tuple(int(x) for x in line.split()) for line in data.decode().splitlines()]
+        except (AttributeError, ValueError):
+            return None
+
+    def save(self, times):
+        self.state.save("".join(f"{b} {t}\n" for b, t in times).encode())
+
+    def sample(self):
+        """Per-CPU usage percentages since the previous sample."""
+        if self.prev is None and self.state:
+            self.prev = self.load()
+        curr = read_cpu_times()
+
+        prev = self.prev
+        # CPU hotplug or a reboot since the state file was written
+        if not prev or len(prev) != len(curr) or any(p[1] > c[1] for p, c in zip(prev, curr)):
+            prev = [(0, 0)] * len(curr)
+
+        self.prev = curr
+        if self.state:
+            self.save(curr)
+        return usage_between(prev, curr)
+
+# ---------------------------------------------------
+# FREQUENCY
+# ---------------------------------------------------
+
+def get_cpu_freq():
+    """Returns (current, max) MHz, or (0, 0) if unavailable."""
+    try:
+        import psutil
+        freq = psutil.cpu_freq()
+        if freq:
+            return freq.current, freq.max
+    except: pass
+    return 0, 0
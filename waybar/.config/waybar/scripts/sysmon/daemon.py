@@ -0,0 +1,118 @@
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+# ---------------------------------------------------
+# SERVER
+# ---------------------------------------------------
+
+class SnapshotServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Runs one Collector on a fixed tick and keeps the rendered JSON of every
+    module. Clients only ever read those strings, they never sample.
+    Observers (e.g. the alert engine) get each raw snapshot as well.
+    Ticks come every `interval` seconds while the numbers move and back off
+    to `max_interval` while they hold still (sysmon.schedule).
+    """
+    daemon_threads = True
+
+    def __init__(self, path, collector, renderers, interval=2.0, observers=(), max_interval=None):
+        from sysmon.pressure import Triggers
+        from sysmon.schedule import Cadence
+        self.collector = collector
+        self.renderers = renderers
+        self.observers = observers
+        self.cadence = Cadence(interval, max_interval or interval)
+        # PSI triggers cut a backed-off sleep short on a pressure spike
+        self.triggers = Triggers()
+        self.outputs = {}
+        # Module -> tick its output last changed; watchers only wake on a change
+        self.changed = {}
+        self.tick = 0
+        self.cond = threading.Condition()
+
+        # A stale socket from a crashed daemon would make bind() fail,
+        # but a live one belongs to another instance
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+                raise RuntimeError(f"already listening on {path}")
+            except OSError:
+                try:
+                    os.unlink(path)
+                except OSError as e:
+                    raise RuntimeError(f"can't remove stale socket {path}: {e.strerror}")
+            finally:
+                probe.close()
+        super().__init__(path, ClientHandler)
+
+    def publish(self, snap):
+        """Renders every module from one snapshot and wakes the watchers."""
+        for observe in self.observers:
+            try:
+                observe(snap)
+            except Exception as e:
+                print(f"sysmond: observer failed: {e}", file=sys.stderr)
+        outputs = {}
+        for name, render in self.renderers.items():
+            try:
+                outputs[name] = json.dumps(render(snap))
+            except Exception as e:
+                outputs[name] = json.dumps({"text": "ERR", "tooltip": str(e)})
+        with self.cond:
+            self.tick += 1
+            for name, line in outputs.items():
+                if self.outputs.get(name) != line:
+                    self.changed[name] = self.tick
+            self.outputs = outputs
+            self.cond.notify_all()
+
+    def sample_loop(self):
+        while True:
+            started = time.monotonic()
+            snap = self.collector.sample()
+            self.publish(snap)
+            delay = self.cadence.update(snap)
+            if self.triggers.wait(max(0.0, delay - (time.monotonic() - started))):
+                self.cadence.reset()
+
+    def serve(self):
+        threading.Thread(target=self.sample_loop, daemon=True).start()
+        try:
+            self.serve_forever()
+        finally:
+            self.server_close()
+            try: os.unlink(self.server_address)
+            except OSError: pass
+
+class ClientHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            cmd, module = self.rfile.readline().decode().split()
+        except ValueError:
+            return
+        server = self.server
+        if module not in server.renderers:
+            self.wfile.write(b'{"text": "N/A", "tooltip": "unknown module"}\n')
+            return
+
+        seen = 0
+        while True:
+            with server.cond:
+                # Wait for the first snapshot, or when watching for the next
+                # one that changes what the module shows (no redundant redraws)
+                server.cond.wait_for(lambda: server.changed.get(module, 0) > seen)
+                seen = server.changed[module]
+                line = server.outputs[module]
+            try:
+                self.wfile.write(line.encode() + b"\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            if cmd != "watch":
+                return
@@ -0,0 +1,543 @@
+"""
+Stand-ins for hardware libraries and sysfs trees, so backends can be
+exercised on machines without the hardware. Each mirrors only what the
+backends actually touch; selfcheck.py drives them through the real code.
+"""
+import os
+
+class FakeNvmlUtilization:
+    def __init__(self, gpu, memory=0):
+        self.gpu = gpu
+        self.memory = memory
+
+class FakeNvmlProcess:
+    def __init__(self, pid, used):
+        self.pid = pid
+        self.usedGpuMemory = used
+
+class FakeNvmlError(Exception):
+    """pynvml.NVMLError look-alike: the NVML return code is in .value."""
+    def __init__(self, value):
+        super().__init__(f"NVML error {value}")
+        self.value = value
+
+class FakeNvml:
+    """
+    pynvml look-alike for one GPU. Counters move a little on every read.
+    `unsupported` names queries that fail with NOT_SUPPORTED on every
+    device (e.g. "nvmlDeviceGetPowerUsage" on laptop GeForce cards);
+    devices whose index is in `lost` fail with GPU_IS_LOST.
+    """
+    NVML_TEMPERATURE_GPU = 0
+    NVML_CLOCK_GRAPHICS = 0
+    NVML_CLOCK_SM = 1
+    NVML_ERROR_NOT_SUPPORTED = 3
+    NVML_ERROR_GPU_IS_LOST = 15
+
+    def __init__(self, name="NVIDIA GeForce RTX 4070", max_sm=2475, count=1, unsupported=(), lost=()):
+        self.name = name
+        self.count = count
+        self.max_sm = max_sm
+        self.unsupported = set(unsupported)
+        self.lost = set(lost)
+        self.initialised = False
+        self.reads = 0
+
+    def check(self, query, handle):
+        if handle in self.lost:
+            raise FakeNvmlError(self.NVML_ERROR_GPU_IS_LOST)
+        if query in self.unsupported:
+            raise FakeNvmlError(self.NVML_ERROR_NOT_SUPPORTED)
+
+    def nvmlInit(self):
+        self.initialised = True
+
+    def nvmlShutdown(self):
+        self.initialised = False
+
+    def nvmlDeviceGetCount(self):
+        return self.count
+
+    def nvmlDeviceGetHandleByIndex(self, index):
+        if not self.initialised:
+            raise RuntimeError("NVML not initialised")
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return index
+
+    def nvmlDeviceGetName(self, handle):
+        return self.name
+
+    def nvmlDeviceGetMaxClockInfo(self, handle, clock):
+        return self.max_sm
+
+    def nvmlDeviceGetUtilizationRates(self, handle):
+        self.check("nvmlDeviceGetUtilizationRates", handle)
+        self.reads += 1
+        return FakeNvmlUtilization(self.reads * 7 % 100)
+
+    def nvmlDeviceGetTemperature(self, handle, sensor):
+        self.check("nvmlDeviceGetTemperature", handle)
+        return 40 + self.reads % 30
+
+    def nvmlDeviceGetPowerUsage(self, handle):
+        self.check("nvmlDeviceGetPowerUsage", handle)
+        return 15000 + (self.reads % 10) * 12500 # mW
+
+    def nvmlDeviceGetClockInfo(self, handle, clock):
+        self.check("nvmlDeviceGetClockInfo", handle)
+        return 210 + (self.reads * 150) % (self.max_sm - 210)
+
+    def nvmlDeviceGetComputeRunningProcesses(self, handle):
+        return []
+
+    def nvmlDeviceGetGraphicsRunningProcesses(self, handle):
+        # This process, so the PID exists in /proc
+        return [FakeNvmlProcess(os.getpid(), 512 * 1024 ** 2)]
+
+# ---------------------------------------------------
+# FAKE SYSFS TREES
+# ---------------------------------------------------
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+def make_amd_sysfs(root, name="AMD Radeon 780M", busy=37, temp_c=52, power_w=18.5, sclk_mhz=1800):
+    """
+    Builds a minimal amdgpu tree under `root` (use as SYSMON_SYSFS).
+    Layout mirrors the real one: class/drm/cardN/device -> devices/pci.../<slot>.
+    """
+    dev = os.path.join(root, "devices", "pci0000:00", "0000:c4:00.0")
+    write_file(os.path.join(dev, "vendor"), "0x1002\n")
+    write_file(os.path.join(dev, "product_name"), name + "\n")
+    write_file(os.path.join(dev, "gpu_busy_percent"), f"{busy}\n")
+    write_file(os.path.join(dev, "pp_dpm_sclk"), f"0: 800Mhz\n1: {sclk_mhz}Mhz *\n2: 2700Mhz\n")
+    hwmon = os.path.join(dev, "hwmon", "hwmon4")
+    write_file(os.path.join(hwmon, "temp1_input"), f"{temp_c * 1000}\n")
+    write_file(os.path.join(hwmon, "power1_average"), f"{int(power_w * 1000000)}\n")
+
+    drm = os.path.join(root, "class", "drm")
+    os.makedirs(os.path.join(drm, "card1"), exist_ok=True)
+    link = os.path.join(drm, "card1", "device")
+    if not os.path.islink(link):
+        os.symlink(os.path.relpath(dev, os.path.dirname(link)), link)
+    # A connector entry, which the probe has to skip
+    os.makedirs(os.path.join(drm, "card1-eDP-1"), exist_ok=True)
+    return root
+
+def make_intel_sysfs(root, card="card0", xe=False, act_mhz=650, max_mhz=1300, rc6_ms=500000):
+    """
+    Intel GPU under `root`: an i915 iGPU (gt_*_freq_mhz and power/rc6_residency_ms
+    on the card) or, with xe=True, an xe card (tile0/gt0 files, plus an hwmon
+    with an energy counter and a temperature, as discrete cards have).
+    The idle counter is static, so bump it between samples to move usage.
+    """
+    slot = "0000:03:00.0" if xe else "0000:00:02.0"
+    dev = os.path.join(root, "devices", "pci0000:00", slot)
+    write_file(os.path.join(dev, "vendor"), "0x8086\n")
+    card_dir = os.path.join(root, "class", "drm", card)
+    os.makedirs(card_dir, exist_ok=True)
+    link = os.path.join(card_dir, "device")
+    if not os.path.islink(link):
+        os.symlink(os.path.relpath(dev, card_dir), link)
+    if xe:
+        gt = os.path.join(dev, "tile0", "gt0")
+        write_file(os.path.join(gt, "freq0", "act_freq"), f"{act_mhz}\n")
+        write_file(os.path.join(gt, "freq0", "max_freq"), f"{max_mhz}\n")
+        write_file(os.path.join(gt, "gtidle", "idle_residency_ms"), f"{rc6_ms}\n")
+        hwmon = os.path.join(dev, "hwmon", "hwmon6")
+        write_file(os.path.join(hwmon, "energy1_input"), "1000000000\n")
+        write_file(os.path.join(hwmon, "temp2_input"), "58000\n")
+    else:
+        write_file(os.path.join(card_dir, "gt_act_freq_mhz"), f"{act_mhz}\n")
+        write_file(os.path.join(card_dir, "gt_max_freq_mhz"), f"{max_mhz}\n")
+        write_file(os.path.join(card_dir, "power", "rc6_residency_ms"), f"{rc6_ms}\n")
+    return root
+
+def make_cpu_topology(root, threads):
+    """
+    devices/system/cpu/cpuN/topology for `threads`, a list of
+    (package, core_id) or (package, core_id, l3 cache id) in cpu number order.
+    Returns the cpu numbers per core.
+    """
+    by_core = {}
+    for cpu, key in enumerate(threads):
+        by_core.setdefault(key[:2], []).append(cpu)
+    for cpu, (package, core, *l3) in enumerate(threads):
+        base = os.path.join(root, "devices", "system", "cpu", f"cpu{cpu}")
+        topo = os.path.join(base, "topology")
+        write_file(os.path.join(topo, "physical_package_id"), f"{package}\n")
+        write_file(os.path.join(topo, "die_id"), "0\n")
+        write_file(os.path.join(topo, "core_id"), f"{core}\n")
+        write_file(os.path.join(topo, "thread_siblings_list"), ",".join(map(str, by_core[(package, core)])) + "\n")
+        if l3:
+            write_file(os.path.join(base, "cache", "index3", "level"), "3\n")
+            write_file(os.path.join(base, "cache", "index3", "id"), f"{l3[0]}\n")
+    write_file(os.path.join(root, "devices", "system", "cpu", "online"), f"0-{len(threads) - 1}\n")
+    return by_core
+
+def make_hwmon(root, index, name, device, temps):
+    """class/hwmon/hwmonN -> devices/<device>/hwmon/hwmonN with tempK_{label,input}."""
+    dev = os.path.join(root, "devices", device)
+    chip = os.path.join(dev, "hwmon", f"hwmon{index}")
+    write_file(os.path.join(chip, "name"), name + "\n")
+    for k, (label, celsius) in enumerate(temps, start=1):
+        write_file(os.path.join(chip, f"temp{k}_label"), label + "\n")
+        write_file(os.path.join(chip, f"temp{k}_input"), f"{int(celsius * 1000)}\n")
+    link = os.path.join(root, "class", "hwmon", f"hwmon{index}")
+    os.makedirs(os.path.dirname(link), exist_ok=True)
+    if not os.path.islink(link):
+        os.symlink(os.path.relpath(chip, os.path.dirname(link)), link)
+    dev_link = os.path.join(chip, "device")
+    if not os.path.islink(dev_link):
+        os.symlink(os.path.relpath(dev, chip), dev_link)
+    return chip
+
+def make_nvme_sysfs(root, disk="nvme0n1", partitions=(2,), temp_c=41.9):
+    """class/block/<disk>{,pN} with the controller's nvme hwmon (Composite temperature)."""
+    ctrl = os.path.join("devices", "pci0000:00", "0000:00:02.4", "0000:02:00.0", "nvme", disk[:-2])
+    dev = os.path.join(root, ctrl, disk)
+    write_file(os.path.join(dev, "dev"), "259:0\n")
+    parts = {}
+    for n in partitions:
+        parts[f"{disk}p{n}"] = os.path.join(dev, f"{disk}p{n}")
+        write_file(os.path.join(parts[f"{disk}p{n}"], "partition"), f"{n}\n")
+    for name, path in dict(parts, **{disk: dev}).items():
+        link = os.path.join(root, "class", "block", name)
+        os.makedirs(os.path.dirname(link), exist_ok=True)
+        if not os.path.islink(link):
+            os.symlink(os.path.relpath(path, os.path.dirname(link)), link)
+    device_link = os.path.join(dev, "device")
+    if not os.path.islink(device_link):
+        os.symlink("..", device_link)
+    chip = os.path.join(root, ctrl, "hwmon9")
+    write_file(os.path.join(chip, "name"), "nvme\n")
+    write_file(os.path.join(chip, "temp1_label"), "Composite\n")
+    write_file(os.path.join(chip, "temp1_input"), f"{int(temp_c * 1000)}\n")
+    return root
+
+def make_net_sysfs(root, links=(("enp3s0", "up", 1000, False), ("wlan0", "down", None, True))):
+    """class/net/<iface>/{operstate,speed,wireless/} for (name, operstate, Mb/s, wireless) links."""
+    for name, state, speed, wireless in links:
+        base = os.path.join(root, "class", "net", name)
+        write_file(os.path.join(base, "operstate"), state + "\n")
+        if speed:
+            write_file(os.path.join(base, "speed"), f"{speed}\n")
+        if wireless:
+            os.makedirs(os.path.join(base, "wireless"), exist_ok=True)
+    return root
+
+def make_hybrid_cpu_sysfs(root, p_cores=4, e_cores=8):
+    """
+    Intel hybrid layout (Alder Lake-P style) under `root` (use as SYSMON_SYSFS):
+    P-cores with SMT at core IDs 0, 4, 8, ..., E-cores without SMT after them,
+    and a coretemp chip with 'Package id 0' plus one 'Core N' per core.
+    P-core threads read 60+N °C, E-cores 40+N °C, so the mapping is visible.
+    """
+    threads = []
+    for i in range(p_cores):
+        threads += [(0, i * 4)] * 2
+    e_base = p_cores * 4
+    threads += [(0, e_base + i) for i in range(e_cores)]
+    make_cpu_topology(root, threads)
+    temps = [("Package id 0", 70)]
+    temps += [(f"Core {i * 4}", 60 + i) for i in range(p_cores)]
+    temps += [(f"Core {e_base + i}", 40 + i) for i in range(e_cores)]
+    make_hwmon(root, 3, "coretemp", os.path.join("platform", "coretemp.0"), temps)
+    return root
+
+def make_epyc_sysfs(root, sockets=2, ccds=4, cores_per_ccd=2):
+    """
+    Multi-CCD AMD layout (EPYC / Threadripper style) under `root`: SMT
+    siblings numbered after every first thread (cpu0 and cpuN share a core),
+    one L3 per CCD, and one k10temp chip per socket with Tctl plus TccdN.
+    Socket 1's chip gets the lower hwmon number, so only PCI order is right.
+    CCD K of socket S reads 50 + 10*S + K °C, Tctl 45 + 10*S.
+    """
+    first = []
+    for socket in range(sockets):
+        for ccd in range(ccds):
+            for i in range(cores_per_ccd):
+                # Core IDs restart per socket; L3 IDs are global
+                first.append((socket, ccd * 8 + i, socket * ccds + ccd))
+    make_cpu_topology(root, first + first)
+    for socket in range(sockets):
+        temps = [("Tctl", 45 + 10 * socket)]
+        temps += [(f"Tccd{ccd + 1}", 50 + 10 * socket + ccd) for ccd in range(ccds)]
+        device = os.path.join("pci0000:00", f"0000:00:{0x18 + socket:02x}.3")
+        make_hwmon(root, 2 + sockets - socket, "k10temp", device, temps)
+    return root
+
+# ---------------------------------------------------
+# FAKE /proc AND TOOLS
+# ---------------------------------------------------
+
+def make_proc(root, threads=None, cpu_name="AMD Ryzen 7 7840U w/ Radeon 780M Graphics"):
+    """
+    Builds the /proc files the collectors read under `root` (use as SYSMON_PROC):
+    cpuinfo, stat, meminfo (with zswap lines), vmstat, pressure/*, diskstats,
+    net/dev, filesystems, self/mountinfo and the boot ID.
+    The only mount listed is / so statvfs hits a real filesystem. `threads`
+    defaults to this machine's count, which keeps the identity cache valid.
+    """
+    threads = threads or os.cpu_count() or 1
+    cpuinfo = []
+    stat = [f"cpu  {threads * 1000} 0 {threads * 500} {threads * 8000} 100 0 50 0 0 0"]
+    for i in range(threads):
+        cpuinfo.append(
+            f"processor\t: {i}\nmodel name\t: {cpu_name}\ncpu MHz\t\t: 2400.000\n"
+            f"physical id\t: 0\ncore id\t\t: {i // 2}\n"
+        )
+        stat.append(f"cpu{i} 1000 0 500 8000 100 0 50 0 0 0")
+    write_file(os.path.join(root, "cpuinfo"), "\n".join(cpuinfo) + "\n")
+    write_file(os.path.join(root, "stat"), "\n".join(stat) + "\nintr 0\nctxt 0\n")
+    write_file(os.path.join(root, "meminfo"), (
+        "MemTotal:       32000000 kB\nMemFree:         8000000 kB\n"
+        "MemAvailable:   20000000 kB\nBuffers:          500000 kB\n"
+        "Cached:         10000000 kB\nShmem:            300000 kB\n"
+        "SReclaimable:     400000 kB\nActive:         12000000 kB\n"
+        "Inactive:        6000000 kB\nSwapTotal:       8000000 kB\n"
+        "SwapFree:        7000000 kB\nZswap:            200000 kB\n"
+        "Zswapped:         700000 kB\n"
+    ))
+    write_file(os.path.join(root, "pressure", "cpu"), "some avg10=3.20 avg60=2.10 avg300=1.00 total=123456\n"
+               "full avg10=0.00 avg60=0.00 avg300=0.00 total=0\n")
+    write_file(os.path.join(root, "pressure", "memory"), "some avg10=6.50 avg60=1.20 avg300=0.40 total=45678\n"
+               "full avg10=1.25 avg60=0.30 avg300=0.10 total=12345\n")
+    write_file(os.path.join(root, "pressure", "io"), "some avg10=0.40 avg60=0.20 avg300=0.10 total=2345\n"
+               "full avg10=0.10 avg60=0.00 avg300=0.00 total=123\n")
+    write_file(os.path.join(root, "vmstat"), "pswpin 0\npswpout 0\n")
+    write_file(os.path.join(root, "diskstats"), (
+        " 259       0 nvme0n1 52000 1200 4100000 21000 88000 9000 7300000 64000 0 61000 85000 0 0 0 0 900 450\n"
+        " 259       2 nvme0n1p2 51000 1200 4090000 20900 87000 9000 7290000 63800 0 60800 84700 0 0 0 0 0 0\n"
+    ))
+    write_file(os.path.join(root, "net", "dev"), (
+        "Inter-|   Receive                                                |  Transmit\n"
+        " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed\n"
+        "    lo: 5120000 4000 0 0 0 0 0 0 5120000 4000 0 0 0 0 0 0\n"
+        "enp3s0: 8123456789 6100000 0 0 0 0 0 1200 912345678 2100000 0 0 0 0 0 0\n"
+        " wlan0: 45678901 52000 0 0 0 0 0 0 3456789 21000 0 0 0 0 0 0\n"
+        "veth1a2b: 1000 10 0 0 0 0 0 0 1000 10 0 0 0 0 0 0\n"
+    ))
+    write_file(os.path.join(root, "filesystems"), "nodev\tproc\nnodev\ttmpfs\n\text4\n\tbtrfs\n")
+    write_file(os.path.join(root, "self", "mountinfo"), "25 1 259:2 / / rw,relatime shared:1 - ext4 /dev/nvme0n1p2 rw\n")
+    write_file(os.path.join(root, "sys", "kernel", "random", "boot_id"), "00000000-0000-4000-8000-00000000b007\n")
+    return root
+
+# Shell stubs: exec'ing them costs what the real fork + exec would, minus the tool's own work
+STUBS = {
+    "nvidia-smi": "#!/bin/sh\necho '0, NVIDIA GeForce RTX 4070, 23, 48, 31.20, 1230, 2475'\n",
+    "lspci": "#!/bin/sh\necho '04:00.0 \"VGA compatible controller\" \"Advanced Micro Devices, Inc. [AMD/ATI]\" \"Phoenix1 [Radeon 780M]\"'\n",
+    "hyprctl": (
+        "#!/bin/sh\necho '[{\"address\": \"0x1\", \"class\": \"firefox\"}, "
+        "{\"address\": \"0x2\", \"class\": \"kitty\"}, {\"address\": \"0x3\", \"class\": \"code\"}]'\n"
+    ),
+}
+
+def make_stub_bin(bindir, tools=tuple(STUBS)):
+    """Writes executable stand-ins for nvidia-smi, lspci and hyprctl (prepend to PATH)."""
+    for tool in tools:
+        path = os.path.join(bindir, tool)
+        write_file(path, STUBS[tool])
+        os.chmod(path, 0o755)
+    return bindir
+
+# ---------------------------------------------------
+# FAKE COMPOSITOR SOCKETS
+# ---------------------------------------------------
+
+class FakeHyprland:
+    """
+    Serves .socket.sock (answers j/clients) and .socket2.sock (event stream)
+    from `socket_dir`, so running_apps.py --stream --socket-dir can run
+    without Hyprland. open_window()/close_window() push events to subscribers.
+    """
+
+    def __init__(self, socket_dir):
+        import socket
+        import threading
+        self.socket_dir = socket_dir
+        self.windows = {}
+        self.subscribers = []
+        self.lock = threading.Lock()
+        os.makedirs(socket_dir, exist_ok=True)
+
+        self.requests = self._listen(socket, ".socket.sock")
+        self.events = self._listen(socket, ".socket2.sock")
+        threading.Thread(target=self._serve_requests, daemon=True).start()
+        threading.Thread(target=self._accept_subscribers, daemon=True).start()
+
+    def _listen(self, socket, name):
+        path = os.path.join(self.socket_dir, name)
+        if os.path.exists(path):
+            os.unlink(path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+        sock.listen(8)
+        return sock
+
+    def _serve_requests(self):
+        import json
+        while True:
+            try:
+                conn, _ = self.requests.accept()
+            except OSError:
+                return
+            with conn:
+                if conn.recv(4096).decode() == "j/clients":
+                    with self.lock:
+                        clients = [{"address": a, "class": c} for a, c in self.windows.items()]
+                    conn.sendall(json.dumps(clients).encode())
+
+    def _accept_subscribers(self):
+        while True:
+            try:
+                conn, _ = self.events.accept()
+            except OSError:
+                return
+            with self.lock:
+                self.subscribers.append(conn)
+
+    def emit(self, line):
+        with self.lock:
+            for conn in list(self.subscribers):
+                try:
+                    conn.sendall(line.encode() + b"\n")
+                except OSError:
+                    self.subscribers.remove(conn)
+
+    def open_window(self, address, cls, title="", workspace="1"):
+        with self.lock:
+            self.windows[address] = cls
+        self.emit(f"openwindow>>{address[2:]},{workspace},{cls},{title}")
+
+    def close_window(self, address):
+        with self.lock:
+            self.windows.pop(address, None)
+        self.emit(f"closewindow>>{address[2:]}")
+
+    def close(self):
+        self.requests.close()
+        self.events.close()
+        with self.lock:
+            for conn in self.subscribers:
+                # shutdown() first: a thread blocked in recv() keeps a bare close() from sending EOF
+                try: conn.shutdown(2)
+                except OSError: pass
+                conn.close()
+
+class FakeSway:
+    """
+    Minimal i3-ipc server on `path` (use as SWAYSOCK). Answers GET_TREE from
+    its window list and SUBSCRIBE; open_window()/close_window() push window
+    events to subscribed clients.
+    """
+    MAGIC = b"i3-ipc"
+
+    def __init__(self, path):
+        import socket
+        import threading
+        self.path = path
+        self.windows = {}
+        self.next_id = 10
+        self.subscribers = []
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            os.unlink(path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen(8)
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _frame(self, msg_type, payload):
+        import json
+        import struct
+        data = json.dumps(payload).encode()
+        return self.MAGIC + struct.pack("=II", len(data), msg_type) + data
+
+    def _accept(self):
+        import threading
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        import struct
+        while True:
+            header = conn.recv(14)
+            if len(header) < 14:
+                conn.close()
+                return
+            length, msg_type = struct.unpack("=II", header[6:])
+            if length:
+                conn.recv(length)
+            if msg_type == 4: # GET_TREE
+                conn.sendall(self._frame(4, self.tree()))
+            elif msg_type == 2: # SUBSCRIBE
+                with self.lock:
+                    conn.sendall(self._frame(2, {"success": True}))
+                    self.subscribers.append(conn)
+            else:
+                conn.sendall(self._frame(msg_type, {"success": False}))
+
+    def container(self, con_id, app_id):
+        # Xwayland windows carry window_properties.class instead of app_id
+        if app_id.startswith("x11:"):
+            return {"id": con_id, "type": "con", "nodes": [], "floating_nodes": [],
+                    "app_id": None, "window_properties": {"class": app_id[4:]}}
+        return {"id": con_id, "type": "con", "nodes": [], "floating_nodes": [], "app_id": app_id}
+
+    def tree(self):
+        with self.lock:
+            leaves = [self.container(i, a) for i, a in self.windows.items()]
+        workspace = {"id": 3, "type": "workspace", "nodes": leaves, "floating_nodes": []}
+        output = {"id": 2, "type": "output", "nodes": [workspace], "floating_nodes": []}
+        return {"id": 1, "type": "root", "nodes": [output], "floating_nodes": []}
+
+    def emit(self, change, con_id, app_id):
+        frame = self._frame(0x80000003, {"change": change, "container": self.container(con_id, app_id)})
+        with self.lock:
+            for conn in list(self.subscribers):
+                try:
+                    conn.sendall(frame)
+                except OSError:
+                    self.subscribers.remove(conn)
+
+    def open_window(self, app_id):
+        """Adds a window ('x11:Class' for an Xwayland one) and returns its id."""
+        with self.lock:
+            con_id = self.next_id
+            self.next_id += 1
+            self.windows[con_id] = app_id
+        self.emit("new", con_id, app_id)
+        return con_id
+
+    def close_window(self, con_id):
+        with self.lock:
+            app_id = self.windows.pop(con_id)
+        self.emit("close", con_id, app_id)
+
+    def close(self):
+        self.server.close()
+        with self.lock:
+            for conn in self.subscribers:
+                # shutdown() first: a thread blocked in recv() keeps a bare close() from sending EOF
+                try: conn.shutdown(2)
+                except OSError: pass
+                conn.close()
+
+if __name__ == "__main__":
+    # python3 -m sysmon.fakes amd|intel|hybrid|epyc|nvme|net|proc|bin <dir>  -> build a fixture tree
+    import sys
+    builders = {"amd": make_amd_sysfs, "intel": make_intel_sysfs, "hybrid": make_hybrid_cpu_sysfs,
+                "epyc": make_epyc_sysfs, "nvme": make_nvme_sysfs, "net": make_net_sysfs, "proc": make_proc, "bin": make_stub_bin}
+    if len(sys.argv) == 3 and sys.argv[1] in builders:
+        print(builders[sys.argv[1]](sys.argv[2]))
+    else:
+        print(f"usage: python3 -m sysmon.fakes {'|'.join(builders)} <dir>", file=sys.stderr)
+        sys.exit(2)
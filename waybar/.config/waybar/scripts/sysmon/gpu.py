@@ -0,0 +1,566 @@
+"""
+Every GPU in the machine, sampled together on each tick.
+
+Backends are discovered once (or reopened from the identity cache) and each
+one's sample() returns a list of card dicts:
+
+    {"id", "vendor", "name", "usage", "temp", "power", "freq_c", "freq_m"}
+
+NVIDIA devices all come from one NVML session or one nvidia-smi call. DRM
+cards are enumerated once from /sys/class/drm and handed to the reader
+registered for their PCI vendor in DRM_VENDORS (amdgpu, i915/xe); a new
+vendor is one reader class and one entry there.
+"""
+import os
+
+from sysmon import profile, sysfs_root
+
+# ---------------------------------------------------
+# NVIDIA
+# ---------------------------------------------------
+# Same columns for the one-shot call and the --loop-ms reader
+SMI_FIELDS = "index,name,utilization.gpu,temperature.gpu,power.draw,clocks.gr,clocks.max.sm"
+
+def parse_smi_row(line):
+    """Parses one csv,noheader,nounits row of SMI_FIELDS ('[N/A]' reads as 0)."""
+    parts = [p.strip() for p in line.split(",")]
+    if len(parts) != 7 or not parts[1]:
+        return None
+
+    def num(s, cast):
+        try: return cast(s)
+        except ValueError: return cast(0)
+
+    return {
+        "id": f"nvidia{parts[0]}",
+        "vendor": "nvidia",
+        "name": parts[1],
+        "usage": num(parts[2], int),
+        "temp": num(parts[3], int),
+        "power": num(parts[4], float),
+        "freq_c": num(parts[5], int),
+        "freq_m": num(parts[6], int)
+    }
+
+def get_nvidia_info():
+    """Every NVIDIA GPU via a single nvidia-smi call ([] without one)."""
+    import subprocess
+    try:
+        with profile.span("exec nvidia-smi"):
+            out = subprocess.check_output(
+                ["nvidia-smi", f"--query-gpu={SMI_FIELDS}", "--format=csv,noheader,nounits"],
+                text=True, stderr=subprocess.DEVNULL
+            )
+    except:
+        return []
+    return [row for row in map(parse_smi_row, out.splitlines()) if row]
+
+class NvmlBackend:
+    """
+    Keeps one NVML session open for the life of the process, with a handle
+    per device. Names and max SM clocks are static and read once; sample()
+    only reads the dynamic counters. `lib` is pynvml or a stand-in with the
+    same API.
+    """
+
+    def __init__(self, lib=None):
+        if lib is None:
+            import pynvml as lib
+        self.lib = lib
+        lib.nvmlInit()
+        self.devices = []
+        for index in range(lib.nvmlDeviceGetCount()):
+            handle = lib.nvmlDeviceGetHandleByIndex(index)
+            name = lib.nvmlDeviceGetName(handle)
+            # Older pynvml releases return bytes
+            name = name.decode() if isinstance(name, bytes) else name
+            try:
+                freq_m = lib.nvmlDeviceGetMaxClockInfo(handle, lib.NVML_CLOCK_SM)
+            except Exception:
+                freq_m = 0
+            self.devices.append((f"nvidia{index}", handle, name, freq_m))
+        if not self.devices:
+            lib.nvmlShutdown()
+            raise RuntimeError("no NVIDIA devices")
+
+    def query(self, fn, *args):
+        """One NVML reading, 0 if the device can't give it (like '[N/A]' from nvidia-smi)."""
+        try:
+            return fn(*args)
+        except Exception:
+            return 0
+
+    def sample(self):
+        lib = self.lib
+        # pynvml's value; 15 in every NVML release
+        gpu_is_lost = getattr(lib, "NVML_ERROR_GPU_IS_LOST", 15)
+        cards = []
+        for card_id, h, name, freq_m in self.devices:
+            try:
+                usage = lib.nvmlDeviceGetUtilizationRates(h).gpu
+            except Exception as e:
+                if getattr(e, "value", None) == gpu_is_lost:
+                    continue  # fell off the bus; the others still report
+                usage = 0
+            # Each reading on its own: laptop GeForce cards, for one, answer
+            # NOT_SUPPORTED for power, and that must not hide the whole card
+            cards.append({
+                "id": card_id,
+                "vendor": "nvidia",
+                "name": name,
+                "usage": usage,
+                "temp": self.query(lib.nvmlDeviceGetTemperature, h, lib.NVML_TEMPERATURE_GPU),
+                "power": self.query(lib.nvmlDeviceGetPowerUsage, h) / 1000.0, # mW -> W
+                "freq_c": self.query(lib.nvmlDeviceGetClockInfo, h, lib.NVML_CLOCK_GRAPHICS),
+                "freq_m": freq_m
+            })
+        return cards
+
+    def describe(self):
+        return [{"vendor": "nvidia", "name": name} for _, _, name, _ in self.devices]
+
+    def process_memory(self):
+        """pid -> bytes of GPU memory, over every device's compute and graphics process lists."""
+        lib = self.lib
+        used = {}
+        for _, h, _, _ in self.devices:
+            # A process in both lists is counted once per device
+            on_device = {}
+            for query in (lib.nvmlDeviceGetComputeRunningProcesses, lib.nvmlDeviceGetGraphicsRunningProcesses):
+                try:
+                    for proc in query(h):
+                        # None when the driver can't attribute memory (e.g. in containers)
+                        if proc.usedGpuMemory:
+                            on_device[proc.pid] = max(on_device.get(proc.pid, 0), proc.usedGpuMemory)
+                except Exception:
+                    pass
+            for pid, size in on_device.items():
+                used[pid] = used.get(pid, 0) + size
+        return used
+
+    def close(self):
+        try: self.lib.nvmlShutdown()
+        except Exception: pass
+
+# Longest a tick waits for nvidia-smi --loop-ms to print its first rows
+FIRST_ROWS_WAIT = 0.5
+
+class SmiLoopBackend:
+    """
+    Fallback when the NVML bindings are missing: one long-running
+    `nvidia-smi --loop-ms` process, with a reader thread keeping the latest
+    row of every device.
+    """
+
+    def __init__(self, interval_ms=2000, cmd="nvidia-smi"):
+        import subprocess
+        import threading
+        self.latest = {}
+        self.ready = threading.Event()
+        self.proc = subprocess.Popen(
+            [cmd, f"--query-gpu={SMI_FIELDS}", "--format=csv,noheader,nounits", f"--loop-ms={interval_ms}"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        threading.Thread(target=self._read_rows, daemon=True).start()
+
+    def _read_rows(self):
+        for line in self.proc.stdout:
+            row = parse_smi_row(line)
+            if row:
+                self.latest[row["id"]] = row
+                self.ready.set()
+        # nvidia-smi exited (no driver / GPU gone)
+        self.latest = {}
+        self.ready.set()
+
+    def rows(self, timeout):
+        # nvidia-smi needs a moment to print its first rows
+        self.ready.wait(timeout)
+        return [self.latest[k] for k in sorted(self.latest)]
+
+    def sample(self):
+        # Within a tick: the collector's gpu deadline (1 s) covers the other
+        # cards too, so give up early and let the next tick show the rows
+        return self.rows(FIRST_ROWS_WAIT)
+
+    def describe(self):
+        # Identity probe, once and off the tick: worth waiting for the names
+        return [{"vendor": "nvidia", "name": card["name"]} for card in self.rows(2.0)]
+
+    def close(self):
+        self.proc.terminate()
+
+class SmiOnceBackend:
+    """One-shot runs without NVML: a single nvidia-smi call per sample."""
+
+    def sample(self):
+        return get_nvidia_info()
+
+    def describe(self):
+        return [{"vendor": "nvidia", "name": card["name"]} for card in self.sample()]
+
+    def close(self):
+        pass
+
+def open_nvidia(resident=False, interval=2.0):
+    """
+    Best available NVIDIA backend, or None if there is no NVIDIA stack.
+    SYSMON_NVML=fake selects the stand-in library from sysmon.fakes,
+    SYSMON_NVML=off skips NVML and goes straight to nvidia-smi.
+    """
+    mode = os.environ.get("SYSMON_NVML")
+    if mode != "off":
+        lib = None
+        if mode == "fake":
+            from sysmon.fakes import FakeNvml
+            lib = FakeNvml()
+        try:
+            return NvmlBackend(lib)
+        except Exception:
+            pass
+
+    import shutil
+    if not shutil.which("nvidia-smi"):
+        return None
+    if resident:
+        return SmiLoopBackend(int(interval * 1000))
+    return SmiOnceBackend()
+
+# ---------------------------------------------------
+# DRM CARDS
+# ---------------------------------------------------
+
+def drm_cards(sysfs=None):
+    """[(card path, PCI vendor id), ...] for every DRM card, connectors skipped."""
+    base = os.path.join(sysfs or sysfs_root(), "class", "drm")
+    try:
+        names = os.listdir(base)
+    except OSError:
+        return []
+    cards = []
+    # card0-DP-1 etc. are connectors, not cards
+    for name in sorted(n for n in names if n.startswith("card") and n[4:].isdigit()):
+        path = os.path.join(base, name)
+        try:
+            with open(os.path.join(path, "device", "vendor"), "r") as f:
+                cards.append((path, f.read().strip().lower()))
+        except OSError:
+            continue
+    return cards
+
+def first_hwmon(card_path):
+    hwmon = os.path.join(card_path, "device", "hwmon")
+    try:
+        names = sorted(os.listdir(hwmon))
+    except OSError:
+        return None
+    return os.path.join(hwmon, names[0]) if names else None
+
+def lspci_name(slot=None, brands=("amd", "ati")):
+    """Marketing name ('Radeon 780M' etc.) from `lspci -mm`, parsed in Python."""
+    import subprocess
+    cmd = ["lspci", "-mm"] + (["-s", slot] if slot else [])
+    try:
+        with profile.span("exec lspci"):
+            out = subprocess.check_output(cmd, text=True, stderr=subprocess.DEVNULL)
+    except:
+        return None
+    for line in out.splitlines():
+        # Format usually: 04:00.0 "VGA compatible controller" "Brand" "Device Name"
+        low = line.lower()
+        if not ("vga" in low or "3d" in low or "display" in low) or not any(b in low for b in brands):
+            continue
+        parts = line.split('"')
+        # The device name is usually in the 4th or 6th slot depending on output
+        if len(parts) >= 6:
+            return parts[5] if parts[5].strip() else parts[3]
+        elif len(parts) >= 4:
+            return parts[3]
+    return None
+
+def card_name(card_path, brands):
+    """product_name from sysfs when the driver exposes it, else lspci for that slot."""
+    try:
+        with open(os.path.join(card_path, "device", "product_name"), "r") as f:
+            name = f.read().strip()
+            if name:
+                return name
+    except OSError:
+        pass
+    try:
+        slot = os.path.basename(os.path.realpath(os.path.join(card_path, "device")))
+    except OSError:
+        slot = None
+    return lspci_name(slot, brands)
+
+class SysfsCard:
+    """
+    Shared plumbing of the DRM readers: every metric file is opened once
+    and re-read with os.pread at offset 0, so the steady state is one read
+    syscall per metric.
+    """
+    vendor = None
+
+    def _open(self, key, path):
+        try:
+            self.fds[key] = os.open(path, os.O_RDONLY)
+            return True
+        except OSError:
+            return False
+
+    def _read(self, key):
+        fd = self.fds.get(key)
+        if fd is None:
+            return None
+        try:
+            return os.pread(fd, 4096, 0).decode()
+        except OSError:
+            return None
+
+    def _read_int(self, key):
+        try:
+            return int(self._read(key).strip())
+        except (AttributeError, ValueError):
+            return None
+
+    def describe(self):
+        return [{"vendor": self.vendor, "name": self.name,
+                 "card_path": self.card_path, "hwmon_path": self.hwmon_path}]
+
+    def close(self):
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds = {}
+
+class AmdSysfsReader(SysfsCard):
+    """
+    Probe-once reader for amdgpu sysfs metrics.
+    Card, hwmon and name are resolved at startup and every metric file is
+    kept open.
+    """
+    vendor = "amd"
+
+    def __init__(self, card_path, hwmon_path=None, name=None, state=None):
+        self.card_path = card_path
+        self.hwmon_path = hwmon_path
+        self.name = name or "AMD Radeon Graphics"
+
+        dev = os.path.join(card_path, "device")
+        self.fds = {}
+        self._open("usage", os.path.join(dev, "gpu_busy_percent"))
+        self._open("sclk", os.path.join(dev, "pp_dpm_sclk"))
+        if hwmon_path:
+            self._open("temp", os.path.join(hwmon_path, "temp1_input")) # Edge temp
+            # Some APUs only expose the instantaneous value
+            if not self._open("power", os.path.join(hwmon_path, "power1_average")):
+                self._open("power", os.path.join(hwmon_path, "power1_input"))
+            self._open("freq", os.path.join(hwmon_path, "freq1_input"))
+
+        # Highest DPM level is the max clock, it never changes
+        import re
+        self.freq_m = 0
+        levels = re.findall(r"(\d+)Mhz", self._read("sclk") or "")
+        if levels:
+            self.freq_m = max(int(x) for x in levels)
+
+    @classmethod
+    def open(cls, card_path, state=None):
+        return cls(card_path, first_hwmon(card_path), card_name(card_path, ("amd", "ati")))
+
+    def sample(self):
+        info = {
+            "id": os.path.basename(self.card_path),
+            "vendor": "amd",
+            "name": self.name,
+            "usage": self._read_int("usage") or 0,
+            "temp": (self._read_int("temp") or 0) // 1000,
+            "power": (self._read_int("power") or 0) / 1000000.0, # microWatts -> Watts
+            "freq_c": (self._read_int("freq") or 0) // 1000000, # Hz to MHz
+            "freq_m": self.freq_m
+        }
+
+        # Fallback for Freq if hwmon failed: pp_dpm_sclk
+        if info["freq_c"] == 0:
+            # format: 0: 400Mhz \n 1: 1200Mhz *
+            import re
+            match = re.search(r"(\d+)Mhz\s*\*", self._read("sclk") or "")
+            if match:
+                info["freq_c"] = int(match.group(1))
+        return [info]
+
+class IntelSysfsReader(SysfsCard):
+    """
+    i915 / xe reader. Neither driver has a busy-percent file, so usage is
+    the share of wall time the GT spent outside RC6 (idle residency) since
+    the previous sample, and power is the hwmon energy counter's delta
+    (discrete cards only). One-shot runs keep the previous counters in a
+    small state file, like CpuSampler.
+    """
+    vendor = "intel"
+
+    def __init__(self, card_path, hwmon_path=None, name=None, state=None):
+        self.card_path = card_path
+        self.hwmon_path = hwmon_path
+        self.name = name or "Intel Graphics"
+        self.state = None
+        if state:
+            from sysmon.cpu import StateFile
+            self.state = StateFile(state)
+        self.prev = None
+
+        dev = os.path.join(card_path, "device")
+        self.fds = {}
+        # xe: per-GT files under the tile; i915: on the card itself
+        gt = os.path.join(dev, "tile0", "gt0")
+        if os.path.isdir(gt):
+            self._open("idle", os.path.join(gt, "gtidle", "idle_residency_ms"))
+            self._open("freq", os.path.join(gt, "freq0", "act_freq"))
+            self.freq_m = self._read_file(os.path.join(gt, "freq0", "max_freq"))
+        else:
+            self._open("idle", os.path.join(card_path, "power", "rc6_residency_ms"))
+            self._open("freq", os.path.join(card_path, "gt_act_freq_mhz"))
+            self.freq_m = self._read_file(os.path.join(card_path, "gt_max_freq_mhz"))
+        if hwmon_path:
+            self._open("energy", os.path.join(hwmon_path, "energy1_input"))
+            for k in (1, 2, 3):
+                if self._open("temp", os.path.join(hwmon_path, f"temp{k}_input")):
+                    break
+
+    @staticmethod
+    def _read_file(path):
+        try:
+            with open(path, "r") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return 0
+
+    @classmethod
+    def open(cls, card_path, state=None):
+        return cls(card_path, first_hwmon(card_path), card_name(card_path, ("intel",)), state)
+
+    def load(self):
+        from array import array
+        data = self.state.load()
+        try:
+            counters = array("d", data)
+        except (TypeError, ValueError):
+            return None
+        return tuple(counters) if len(counters) == 3 else None
+
+    def save(self, counters):
+        from array import array
+        self.state.save(array("d", counters).tobytes())
+
+    def sample(self):
+        import time
+        # (wall ms, idle ms, energy µJ)
+        curr = (time.monotonic() * 1000, self._read_int("idle") or 0, self._read_int("energy") or 0)
+        prev = self.prev
+        if prev is None and self.state:
+            prev = self.load()
+        self.prev = curr
+        if self.state:
+            self.save(curr)
+
+        usage = 0
+        power = 0.0
+        # Counters go backwards across suspend / driver reload: skip that interval
+        if prev and curr[0] > prev[0] and curr[1] >= prev[1]:
+            elapsed = curr[0] - prev[0]
+            usage = round(min(100.0, max(0.0, 100.0 - (curr[1] - prev[1]) / elapsed * 100)))
+            if curr[2] >= prev[2]:
+                power = (curr[2] - prev[2]) / elapsed / 1000.0 # µJ/ms -> W
+        return [{
+            "id": os.path.basename(self.card_path),
+            "vendor": "intel",
+            "name": self.name,
+            "usage": usage,
+            "temp": (self._read_int("temp") or 0) // 1000,
+            "power": power,
+            "freq_c": self._read_int("freq") or 0,
+            "freq_m": self.freq_m
+        }]
+
+# PCI vendor -> reader. NVIDIA cards also show up here but are left to NVML.
+DRM_VENDORS = {
+    "0x1002": AmdSysfsReader,
+    "0x8086": IntelSysfsReader,
+}
+READERS = {cls.vendor: cls for cls in DRM_VENDORS.values()}
+
+# ---------------------------------------------------
+# REGISTRY
+# ---------------------------------------------------
+
+def open_backends(known=None, resident=False, interval=2.0, state=None):
+    """
+    Backends for every GPU: from cached identity entries when given (no drm
+    scan, no lspci), else by probing NVIDIA and each DRM card once.
+    `state` names the one-shot state files of readers that need deltas.
+    """
+    def state_file(card_path):
+        if not state:
+            return None
+        from sysmon.cpu import state_path
+        return state_path(f"{state}.{os.path.basename(card_path)}.gpu")
+
+    backends = []
+    if known is None:
+        nvidia = open_nvidia(resident, interval)
+        if nvidia:
+            backends.append(nvidia)
+        for card_path, vendor_id in drm_cards():
+            cls = DRM_VENDORS.get(vendor_id)
+            if cls:
+                backends.append(cls.open(card_path, state_file(card_path)))
+        return backends
+
+    if any(entry["vendor"] == "nvidia" for entry in known):
+        nvidia = open_nvidia(resident, interval)
+        if nvidia:
+            backends.append(nvidia)
+    for entry in known:
+        cls = READERS.get(entry["vendor"])
+        if cls:
+            backends.append(cls(entry["card_path"], entry["hwmon_path"], entry["name"], state_file(entry["card_path"])))
+    return backends
+
+def busiest(cards):
+    """The card the bar shows: highest usage, then highest power (the dGPU when both idle)."""
+    return max(cards, key=lambda c: (c["usage"], c["power"]))
+
+class GpuMonitor:
+    """Opens every GPU backend once and samples them all on each tick."""
+
+    def __init__(self, resident=False, interval=2.0, identity=None, state=None):
+        # A cached identity (sysmon.identity) says which backends to open,
+        # so neither the drm scan nor lspci runs again
+        known = identity.get("gpus") if identity else None
+        self.backends = open_backends(known, resident, interval, state)
+
+    def sample(self):
+        """
+        The busiest card's dict plus "cards", every card's dict.
+        Returns None if no GPU was found.
+        """
+        cards = []
+        for backend in self.backends:
+            cards.extend(backend.sample())
+        if not cards:
+            return None
+        return dict(busiest(cards), cards=cards)
+
+    def process_memory(self):
+        """pid -> GPU memory bytes when NVML is open, else None (use DRM fdinfo)."""
+        for backend in self.backends:
+            if hasattr(backend, "process_memory"):
+                return backend.process_memory()
+        return None
+
+    def close(self):
+        for backend in self.backends:
+            backend.close()
+
+def get_gpu_info():
+    """One-shot sample for scripts that exit after printing."""
+    return GpuMonitor().sample()
@@ -0,0 +1,151 @@
+"""
+Fixed-size ring buffers of recent samples, rendered as sparklines.
+
+Memory is constant: every series is `size` doubles in one flat buffer.
+Resident processes keep that buffer in memory; one-shot runs map it from a
+small file under XDG_RUNTIME_DIR so history survives between invocations.
+Building a tooltip only reads the buffer, it never samples anything.
+"""
+import math
+import os
+import struct
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+# Two minutes at the default 2 s tick
+DEFAULT_SIZE = 60
+
+MAGIC = b"SMHIST1\0"
+# magic, size, number of series
+HEADER = struct.Struct("=8sII")
+
+def metric_names(threads):
+    """Every recorded series, in buffer order."""
+    return (["cpu", "cpu.temp"]
+            + [f"cpu.t{i}" for i in range(threads)]
+            + ["gpu", "gpu.temp", "gpu.power", "ram", "swap", "net.rx", "net.tx"])
+
+class Series:
+    """One ring buffer view: `data` holds the values, `meta` [head, count]."""
+
+    def __init__(self, data, meta):
+        self.data = data
+        self.meta = meta
+
+    def push(self, value):
+        head, count = self.meta[0], self.meta[1]
+        self.data[head] = float(value)
+        self.meta[0] = (head + 1) % len(self.data)
+        self.meta[1] = min(count + 1, len(self.data))
+
+    def values(self, last=None):
+        """Oldest to newest, at most `last` of them."""
+        size = len(self.data)
+        head, count = self.meta[0], self.meta[1]
+        n = count if last is None else min(count, last)
+        return [self.data[(head - n + i) % size] for i in range(n)]
+
+    def stats(self):
+        """(min, avg, max) over the buffer, or None while empty."""
+        vals = self.values()
+        if not vals:
+            return None
+        return min(vals), sum(vals) / len(vals), max(vals)
+
+    def sparkline(self, width=20, lo=None, hi=None):
+        """
+        Last `width` samples as block characters. Percent metrics pass
+        lo=0, hi=100; otherwise the range of the window itself is used.
+        """
+        vals = self.values(width)
+        if not vals:
+            return ""
+        lo = min(vals) if lo is None else lo
+        hi = max(vals) if hi is None else hi
+        span = hi - lo
+        top = len(SPARK_CHARS) - 1
+        if span <= 0:
+            return SPARK_CHARS[0] * len(vals)
+        return "".join(SPARK_CHARS[max(0, min(top, int((v - lo) / span * top + 0.5)))] for v in vals)
+
+class History:
+    """
+    Named Series over one flat buffer:
+    HEADER, then [head, count] per series (u32), then size doubles per series.
+    """
+
+    def __init__(self, names, size=DEFAULT_SIZE, buf=None):
+        self.names = names
+        self.size = size
+        length = self.buffer_length(len(names), size)
+        self.buf = buf if buf is not None else bytearray(length)
+
+        magic, old_size, old_count = HEADER.unpack_from(self.buf, 0)
+        if (magic, old_size, old_count) != (MAGIC, size, len(names)):
+            # New file, or the layout changed (resized, CPU count changed)
+            self.buf[:length] = bytes(length)
+            HEADER.pack_into(self.buf, 0, MAGIC, size, len(names))
+
+        view = memoryview(self.buf)
+        meta_end = HEADER.size + 8 * len(names)
+        metas = view[HEADER.size:meta_end].cast("I")
+        values = view[meta_end:length].cast("d")
+        self.series = {
+            name: Series(values[i * size:(i + 1) * size], metas[i * 2:i * 2 + 2])
+            for i, name in enumerate(names)
+        }
+
+    @staticmethod
+    def buffer_length(count, size):
+        return HEADER.size + 8 * count + 8 * count * size
+
+    @classmethod
+    def mapped(cls, path, names, size=DEFAULT_SIZE):
+        """History backed by a shared file mapping at `path`."""
+        import mmap
+        length = cls.buffer_length(len(names), size)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size != length:
+                os.ftruncate(fd, length)
+            mm = mmap.mmap(fd, length)
+        finally:
+            os.close(fd)
+        return cls(names, size, mm)
+
+    def __getitem__(self, name):
+        return self.series[name]
+
+    def record(self, snap):
+        """Pushes one snapshot's values. Missing or stale sources are skipped."""
+        stale = snap.get("stale", [])
+        cpu = snap.get("cpu")
+        if cpu and cpu.get("usages") and "cpu" not in stale:
+            self.series["cpu"].push(cpu["usage"])
+            self.series["cpu.temp"].push(cpu["temp"])
+            for i, usage in enumerate(cpu["usages"]):
+                series = self.series.get(f"cpu.t{i}")
+                if series:
+                    series.push(usage)
+        gpu = snap.get("gpu")
+        if gpu and "gpu" not in stale:
+            self.series["gpu"].push(gpu["usage"])
+            self.series["gpu.temp"].push(gpu["temp"])
+            self.series["gpu.power"].push(gpu["power"])
+        mem = snap.get("mem")
+        if mem and mem.get("total") and "mem" not in stale:
+            self.series["ram"].push(mem["percent"])
+            self.series["swap"].push(mem["swap_percent"])
+        net = snap.get("net")
+        if net and "net" not in stale:
+            # kB/s, so the min/avg/max summary reads in whole numbers
+            self.series["net.rx"].push(net["rx"] / 1e3)
+            self.series["net.tx"].push(net["tx"] / 1e3)
+
+def summary(series, unit="", fmt="{:.0f}"):
+    """'min 3% avg 12% max 88%' for a tooltip line, '' while empty."""
+    stats = series.stats()
+    if stats is None or any(math.isnan(x) for x in stats):
+        return ""
+    lo, avg, hi = (fmt.format(x) + unit for x in stats)
+    return f"min {lo} avg {avg} max {hi}"
@@ -0,0 +1,137 @@
+"""
+On-disk cache of hardware facts that cannot change while the machine is up:
+CPU name and topology, the temperature sensor of every thread,
+every GPU's vendor/name and sysfs/hwmon paths.
+Keyed by the kernel boot ID, so it is rebuilt after every reboot.
+"""
+import json
+import os
+
+from sysmon import cpu as cpu_src
+from sysmon import proc_root, sysfs_root
+
+# Bump when the cached fields change shape
+VERSION = 5
+
+def cache_path():
+    """$XDG_CACHE_HOME/waybar-sysmon/identity.json"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "waybar-sysmon", "identity.json")
+
+def boot_id():
+    try:
+        with open(os.path.join(proc_root(), "sys", "kernel", "random", "boot_id"), "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def fixtures():
+    """The stand-ins in effect (SYSMON_SYSFS, SYSMON_PROC, SYSMON_NVML); part of the cache key."""
+    return [sysfs_root(), proc_root(), os.environ.get("SYSMON_NVML")]
+
+def read_topology():
+    """(cores, threads) from /proc/cpuinfo physical/core id pairs."""
+    cores = set()
+    threads = 0
+    physical = "0"
+    try:
+        with open(os.path.join(proc_root(), "cpuinfo"), "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "processor":
+                    threads += 1
+                elif key == "physical id":
+                    physical = value.strip()
+                elif key == "core id":
+                    cores.add((physical, value.strip()))
+    except OSError:
+        pass
+    threads = threads or os.cpu_count() or 1
+    return len(cores) or threads, threads
+
+def online_cpus():
+    """The kernel's online CPU list ('0-15,32-47'), or None when the tree has none."""
+    try:
+        with open(os.path.join(sysfs_root(), "devices", "system", "cpu", "online"), "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def probe_gpus():
+    """Runs the normal GPU discovery once and keeps every card it found."""
+    from sysmon import gpu as gpu_src
+    found = []
+    for backend in gpu_src.open_backends():
+        found.extend(backend.describe())
+        backend.close()
+    return found
+
+def build(boot):
+    from sysmon import topology
+    cores, threads = read_topology()
+    return {
+        "version": VERSION,
+        "boot_id": boot,
+        "fixtures": fixtures(),
+        "cpu_name": cpu_src.get_cpu_name(),
+        "cores": cores,
+        "threads": threads,
+        "online": online_cpus(),
+        "cpu_sensors": topology.resolve(),
+        "gpus": probe_gpus(),
+    }
+
+def still_valid(ident, boot):
+    """Same boot and the hardware we cached is still there."""
+    if ident.get("version") != VERSION or ident.get("boot_id") != boot:
+        return False
+    # Built against fixtures or the real hardware
+    if ident.get("fixtures") != fixtures():
+        return False
+    # CPU hotplug, checked against the same trees the cache was built from
+    # (a fixture's thread count has nothing to do with this machine's)
+    online = online_cpus()
+    if online is not None:
+        if ident.get("online") != online:
+            return False
+    elif ident.get("threads") != read_topology()[1]:
+        return False
+    # hwmon driver reloaded (chips renumbered)
+    sensors = ident.get("cpu_sensors")
+    if sensors and not all(os.path.exists(p) for p in sensors["packages"]):
+        return False
+    # GPU unbound / removed
+    for gpu in ident.get("gpus", []):
+        if gpu.get("card_path") and not os.path.exists(gpu["card_path"]):
+            return False
+    return True
+
+def save(ident, path):
+    """Atomic write, so a concurrent reader never sees half a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(ident, f)
+    os.replace(tmp, path)
+
+def load_identity(path=None):
+    """Cached identity for this boot, rebuilding (and saving) it when stale."""
+    path = path or cache_path()
+    boot = boot_id()
+    try:
+        with open(path, "r") as f:
+            ident = json.load(f)
+        if still_valid(ident, boot):
+            return ident
+    except (OSError, ValueError):
+        pass
+
+    ident = build(boot)
+    # Without a boot ID there is nothing safe to key the cache on
+    if boot:
+        try:
+            save(ident, path)
+        except OSError:
+            pass
+    return ident
@@ -0,0 +1,60 @@
+"""
+Pieces for rendering Pango tooltips tick after tick without redoing work.
+
+ColorScale turns a band list into a lookup table, so colouring a value is
+one int() and one list index. Cells keeps the formatted markup of every
+named cell together with the values it was formatted from; a cell whose
+values (already rounded to display precision) match the last tick returns
+its cached string, the very same object, so comparing this tick's lines
+with the last tick's is mostly identity checks.
+
+Names the system hands us (process comm, mount, interface, GPU, window
+class) go through escape() before they meet a template: any process can
+rename itself to "<i>&", and one stray '<' makes waybar drop the tooltip.
+"""
+
+# What html.escape(quote=True) replaces, without importing html (and re)
+MARKUP_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"})
+
+def escape(text):
+    """`text` safe to put in Pango markup. Pad or cut it before, not after."""
+    return str(text).translate(MARKUP_ESCAPES)
+
+class ColorScale:
+    """
+    get_color()-style banding as a lookup table over whole numbers.
+    `bands` is [(upper limit, colour), ...] ascending; values from the last
+    limit up get `top`. Limits are integers, so flooring the value first
+    gives the same colour as comparing the float.
+    """
+
+    def __init__(self, bands, top, fallback="#ffffff"):
+        self.top = top
+        self.fallback = fallback
+        self.table = []
+        for limit, color in bands:
+            self.table.extend([color] * (limit - len(self.table)))
+
+    def __call__(self, value):
+        try:
+            i = int(value)
+        except (TypeError, ValueError):
+            return self.fallback
+        if i < 0:
+            i = 0
+        return self.table[i] if i < len(self.table) else self.top
+
+class Cells:
+    """Named markup fragments, re-formatted only when their values change."""
+
+    def __init__(self):
+        self.cache = {}
+
+    def __call__(self, name, template, *values):
+        """template.format(*values), reused while `values` stay equal."""
+        hit = self.cache.get(name)
+        if hit is not None and hit[0] == values:
+            return hit[1]
+        text = template.format(*values)
+        self.cache[name] = (values, text)
+        return text
@@ -0,0 +1,246 @@
+"""
+Network throughput: per-interface rx/tx rates and link state.
+
+Rates are the byte counter deltas in /proc/net/dev, read once per tick
+through a descriptor that stays open (and from a small state file for
+one-shot runs, like the CPU and disk counters).
+
+Link state is read from /sys/class/net once per interface and then kept
+current by rtnetlink: a NETLINK_ROUTE socket subscribed to RTMGRP_LINK
+queues an RTM_NEWLINK / RTM_DELLINK message whenever a link changes, and
+each tick drains it without blocking. A steady link costs nothing, and an
+unplugged cable shows up on the next tick without polling operstate.
+"""
+import os
+import struct
+import time
+
+from sysmon import proc_root, profile, sysfs_root
+
+# Never shown or counted in the totals (container and VM plumbing)
+IGNORE_PREFIXES = ("lo", "veth", "docker", "br-", "virbr")
+
+# ---------------------------------------------------
+# /proc/net/dev
+# ---------------------------------------------------
+
+def parse_net_dev(text, ignore=IGNORE_PREFIXES):
+    """{iface: (rx_bytes, tx_bytes)} from /proc/net/dev's text."""
+    counters = {}
+    # Two header lines, then "  name: rx_bytes packets ... tx_bytes ..."
+    for line in text.splitlines()[2:]:
+        name, _, rest = line.partition(":")
+        name = name.strip()
+        fields = rest.split()
+        if len(fields) < 9 or name.startswith(ignore):
+            continue
+        counters[name] = (int(fields[0]), int(fields[8]))
+    return counters
+
+def human_rate(bps):
+    """Bytes per second as 1.2M / 340K / 12B, for narrow bar and table columns."""
+    for unit, size in (("G", 1e9), ("M", 1e6), ("K", 1e3)):
+        if bps >= size:
+            return f"{bps / size:.1f}{unit}" if bps < size * 10 else f"{bps / size:.0f}{unit}"
+    return f"{bps:.0f}B"
+
+def link_label(iface):
+    """'1G' / '100M' for wired links that report a speed, else the operstate."""
+    speed = iface.get("speed")
+    if iface["state"] != "up" or not speed:
+        return iface["state"]
+    return f"{speed // 1000}G" if speed >= 1000 and speed % 1000 == 0 else f"{speed}M"
+
+# ---------------------------------------------------
+# LINK STATE (rtnetlink)
+# ---------------------------------------------------
+RTMGRP_LINK = 1
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+IFLA_IFNAME = 3
+IFLA_OPERSTATE = 16
+# IF_OPER_* in rtnetlink order
+OPERSTATES = ("unknown", "notpresent", "down", "lowerlayerdown", "testing", "dormant", "up")
+
+# nlmsghdr: len, type, flags, seq, pid; ifinfomsg: family, pad, type, index, flags, change
+NLMSGHDR = struct.Struct("=IHHII")
+IFINFOMSG = struct.Struct("=BxHiII")
+RTATTR = struct.Struct("=HH")
+
+def parse_link_messages(data):
+    """[(msg type, ifname, operstate or None), ...] from one netlink recv."""
+    links = []
+    offset = 0
+    while offset + NLMSGHDR.size <= len(data):
+        length, msg_type, _, _, _ = NLMSGHDR.unpack_from(data, offset)
+        if length < NLMSGHDR.size:
+            break
+        end = offset + length
+        if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+            name = state = None
+            attr = offset + NLMSGHDR.size + IFINFOMSG.size
+            while attr + RTATTR.size <= end:
+                rta_len, rta_type = RTATTR.unpack_from(data, attr)
+                if rta_len < RTATTR.size:
+                    break
+                payload = data[attr + RTATTR.size:attr + rta_len]
+                if rta_type == IFLA_IFNAME:
+                    name = payload.split(b"\0", 1)[0].decode()
+                elif rta_type == IFLA_OPERSTATE and payload:
+                    state = OPERSTATES[payload[0]] if payload[0] < len(OPERSTATES) else "unknown"
+                # Attributes are 4-byte aligned
+                attr += (rta_len + 3) & ~3
+            if name:
+                links.append((msg_type, name, state))
+        offset += (length + 3) & ~3
+    return links
+
+class LinkWatcher:
+    """
+    iface -> {"state", "speed", "wireless"}: sysfs on first sight, rtnetlink
+    after that. Without a netlink socket (one-shot runs, fixture /proc, no
+    AF_NETLINK) every tick re-reads operstate instead.
+    """
+
+    def __init__(self, netlink=True):
+        self.links = {}
+        self.sock = None
+        # A fixture /proc describes interfaces the kernel doesn't have
+        if not netlink or proc_root() != "/proc":
+            return
+        import socket
+        try:
+            self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW | socket.SOCK_NONBLOCK, socket.NETLINK_ROUTE)
+            self.sock.bind((0, RTMGRP_LINK))
+        except (OSError, AttributeError):
+            self.sock = None
+
+    @staticmethod
+    def read_sysfs(name):
+        base = os.path.join(sysfs_root(), "class", "net", name)
+        link = {"state": "unknown", "speed": None, "wireless": os.path.isdir(os.path.join(base, "wireless"))}
+        try:
+            with open(os.path.join(base, "operstate"), "r") as f:
+                link["state"] = f.read().strip()
+        except OSError:
+            pass
+        try:
+            # Mb/s; -1 or EINVAL while down, absent on wifi and virtual links
+            with open(os.path.join(base, "speed"), "r") as f:
+                speed = int(f.read())
+            link["speed"] = speed if speed > 0 else None
+        except (OSError, ValueError):
+            pass
+        return link
+
+    def drain(self):
+        """Applies every queued link change."""
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                return
+            except OSError:
+                # ENOBUFS: the queue overflowed and changes were lost; start over
+                self.links = {}
+                return
+            for msg_type, name, state in parse_link_messages(data):
+                if msg_type == RTM_DELLINK:
+                    self.links.pop(name, None)
+                elif name in self.links:
+                    # Speed changes with the state (renegotiation), re-read it
+                    self.links[name] = self.read_sysfs(name)
+                    if state:
+                        self.links[name]["state"] = state
+
+    def get(self, names):
+        """{iface: {"state", "speed", "wireless"}} for these interfaces."""
+        if self.sock is None:
+            self.links = {}
+        else:
+            self.drain()
+        for name in names:
+            if name not in self.links:
+                self.links[name] = self.read_sysfs(name)
+        return self.links
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+
+# ---------------------------------------------------
+# MONITOR
+# ---------------------------------------------------
+
+class NetMonitor:
+    """
+    sample() -> {"rx", "tx", "interfaces"}: total bytes/s over every shown
+    interface, plus one dict per interface (name, rx, tx, state, speed,
+    wireless), busiest first. Rates are 0 on the first tick and after a counter reset.
+    """
+
+    def __init__(self, state_path=None):
+        from sysmon.cpu import StateFile
+        self.state = StateFile(state_path) if state_path else None
+        self.fd = os.open(os.path.join(proc_root(), "net", "dev"), os.O_RDONLY)
+        self.prev = None
+        # One-shot runs (with a state file) exit long before any change arrives
+        self.links = LinkWatcher(netlink=state_path is None)
+
+    def read(self):
+        chunks = []
+        offset = 0
+        while True:
+            chunk = os.pread(self.fd, 65536, offset)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            offset += len(chunk)
+        return parse_net_dev(b"".join(chunks).decode())
+
+    def load(self):
+        data = self.state.load()
+        try:
+            when, *lines = data.decode().splitlines()
+            return float(when), {name: (int(rx), int(tx)) for name, rx, tx in (l.split() for l in lines)}
+        except (AttributeError, ValueError):
+            return None
+
+    def save(self, when, counters):
+        lines = [f"{when}\n"] + [f"{name} {rx} {tx}\n" for name, (rx, tx) in counters.items()]
+        self.state.save("".join(lines).encode())
+
+    def sample(self):
+        now = time.time()
+        with profile.span("net.dev"):
+            counters = self.read()
+        prev = self.prev
+        if prev is None and self.state:
+            prev = self.load()
+        self.prev = (now, counters)
+        if self.state:
+            self.save(now, counters)
+        with profile.span("net.links"):
+            links = self.links.get(counters)
+
+        elapsed = now - prev[0] if prev else 0
+        interfaces = []
+        for name, (rx, tx) in counters.items():
+            old = prev[1].get(name) if prev else None
+            if old is None or elapsed <= 0 or rx < old[0] or tx < old[1]:
+                rx_rate = tx_rate = 0.0
+            else:
+                rx_rate = (rx - old[0]) / elapsed
+                tx_rate = (tx - old[1]) / elapsed
+            interfaces.append(dict(links[name], name=name, rx=rx_rate, tx=tx_rate))
+        # Busiest first; among idle ones, links that are up first
+        interfaces.sort(key=lambda i: (i["rx"] + i["tx"], i["state"] == "up"), reverse=True)
+        return {
+            "rx": sum(i["rx"] for i in interfaces),
+            "tx": sum(i["tx"] for i in interfaces),
+            "interfaces": interfaces,
+        }
+
+    def close(self):
+        os.close(self.fd)
+        self.links.close()
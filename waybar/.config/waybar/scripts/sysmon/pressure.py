@@ -0,0 +1,166 @@
+"""
+Memory pressure: PSI stall shares and compressed swap (zram / zswap).
+
+/proc/pressure/{cpu,memory,io} say what share of the last 10 s tasks spent
+stalled on each resource: "some" is at least one task waiting, "full" all
+of them (memory and io only). Those are the numbers that tell thrashing
+apart from a merely full page cache, which RAM/Swap percentages cannot.
+
+Resident loops can also register PSI triggers (Triggers): the kernel then
+wakes a poll() the moment stalls pass a threshold within a window, so a
+spike is shown straight away instead of on the next (possibly backed-off)
+tick. Unprivileged processes may create triggers whose window is a
+multiple of 2 s.
+"""
+import os
+
+from sysmon import proc_root, sysfs_root
+
+RESOURCES = ("cpu", "memory", "io")
+
+# resource -> (kind, stall µs, window µs). Memory/io get "some" triggers at
+# 10% of a 2 s window; CPU contention is routine on a desktop, so only a
+# heavier 50% wakes the loop for it.
+TRIGGERS = {
+    "memory": ("some", 200000, 2000000),
+    "io": ("some", 200000, 2000000),
+    "cpu": ("some", 1000000, 2000000),
+}
+
+def parse_psi(text):
+    """{"some": avg10, "full": avg10} from one /proc/pressure file's text."""
+    values = {}
+    for line in text.splitlines():
+        kind, _, rest = line.partition(" ")
+        for field in rest.split():
+            key, _, value = field.partition("=")
+            if key == "avg10":
+                values[kind] = float(value)
+                break
+    return values
+
+class PressureReader:
+    """
+    Keeps /proc/pressure/* open and preads them each tick. sample() returns
+    flat fields for the mem source: psi_cpu, psi_memory, psi_memory_full,
+    psi_io (avg10 %, None without PSI), plus zram and zswap.
+    """
+
+    def __init__(self):
+        base = os.path.join(proc_root(), "pressure")
+        self.fds = {}
+        for resource in RESOURCES:
+            try:
+                self.fds[resource] = os.open(os.path.join(base, resource), os.O_RDONLY)
+            except OSError:
+                pass  # CONFIG_PSI off, or psi=0 on the command line
+        # zram devices don't come and go without a reconfig; look once
+        block = os.path.join(sysfs_root(), "block")
+        try:
+            self.zram = [os.path.join(block, d, "mm_stat") for d in sorted(os.listdir(block)) if d.startswith("zram")]
+        except OSError:
+            self.zram = []
+
+    def psi(self):
+        fields = {"psi_cpu": None, "psi_memory": None, "psi_memory_full": None, "psi_io": None}
+        for resource, fd in self.fds.items():
+            try:
+                values = parse_psi(os.pread(fd, 256, 0).decode())
+            except (OSError, ValueError):
+                continue
+            fields[f"psi_{resource}"] = values.get("some")
+            if resource == "memory":
+                fields["psi_memory_full"] = values.get("full")
+        return fields
+
+    def zram_stats(self):
+        """{"orig", "compr", "used"} bytes over every zram device, or None."""
+        total = None
+        for path in self.zram:
+            try:
+                with open(path, "r") as f:
+                    # orig_data_size compr_data_size mem_used_total ...
+                    orig, compr, used = (int(x) for x in f.read().split()[:3])
+            except (OSError, ValueError):
+                continue
+            total = total or {"orig": 0, "compr": 0, "used": 0}
+            total["orig"] += orig
+            total["compr"] += compr
+            total["used"] += used
+        return total
+
+    @staticmethod
+    def zswap_stats():
+        """{"pool", "stored"} bytes from /proc/meminfo (kernel 6.0+), or None."""
+        found = {}
+        try:
+            with open(os.path.join(proc_root(), "meminfo"), "r") as f:
+                for line in f:
+                    if line.startswith("Zswap"):
+                        key, _, value = line.partition(":")
+                        found[key] = int(value.split()[0]) * 1024
+        except (OSError, ValueError):
+            return None
+        if not found.get("Zswapped"):
+            return None
+        return {"pool": found.get("Zswap", 0), "stored": found["Zswapped"]}
+
+    def sample(self):
+        fields = self.psi()
+        fields["zram"] = self.zram_stats()
+        fields["zswap"] = self.zswap_stats()
+        return fields
+
+    def close(self):
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds = {}
+
+class Triggers:
+    """
+    PSI trigger fds for TRIGGERS. wait(timeout) sleeps like time.sleep but
+    returns True early when any trigger fires. Without PSI (or without
+    permission) there are no fds and it is a plain sleep.
+    """
+
+    def __init__(self, triggers=None):
+        import select
+        self.poller = select.poll()
+        self.fds = []
+        # A fixture /proc has no kernel behind it; writing would clobber it
+        if proc_root() != "/proc":
+            return
+        base = os.path.join(proc_root(), "pressure")
+        for resource, (kind, stall, window) in (triggers or TRIGGERS).items():
+            try:
+                fd = os.open(os.path.join(base, resource), os.O_RDWR | os.O_NONBLOCK)
+            except OSError:
+                continue
+            try:
+                os.write(fd, f"{kind} {stall} {window}\0".encode())
+            except OSError:
+                os.close(fd)
+                continue
+            self.poller.register(fd, select.POLLPRI)
+            self.fds.append(fd)
+
+    def wait(self, timeout):
+        if not self.fds:
+            import time
+            time.sleep(timeout)
+            return False
+        import select
+        events = self.poller.poll(max(0, timeout) * 1000)
+        for _, mask in events:
+            if mask & select.POLLERR:
+                # Monitored cgroup/file went away: stop watching, keep sleeping
+                self.close()
+                return False
+        return bool(events)
+
+    def close(self):
+        for fd in self.fds:
+            try: self.poller.unregister(fd)
+            except (KeyError, ValueError): pass
+            os.close(fd)
+        self.fds = []
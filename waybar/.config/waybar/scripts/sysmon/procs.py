@@ -0,0 +1,221 @@
+"""
+Top processes by CPU, resident memory and GPU memory.
+
+A tick lists /proc and reads one file per process, /proc/<pid>/stat, whose
+CPU ticks are compared with the previous read. Entries remember their start
+time, so a recycled PID never inherits another process's counters, and the
+name is decoded only the first time a process is seen. Resident collectors
+keep the table in memory and re-read idle processes only every IDLE_EVERY
+ticks (most of a desktop's thousands of processes are asleep); one-shot runs
+keep the previous ticks in a small state file so CPU shares cover the
+refresh interval.
+
+GPU memory comes from NVML when the collector has a session open, otherwise
+from DRM fdinfo (amdgpu, i915, xe). fdinfo means walking /proc/<pid>/fd, so
+the list of GPU clients is rebuilt every DRM_RESCAN seconds and only the
+known clients' fdinfo is re-read in between.
+"""
+import os
+import time
+
+from sysmon import proc_root
+
+TOP_N = 5
+# Resident tables re-read a process that used no CPU at its last read only
+# every N ticks; it counts as 0% in between and keeps its last RSS
+IDLE_EVERY = 4
+# Seconds between full walks of every process's fds for DRM clients
+DRM_RESCAN = 30
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+def read_stat(path):
+    """(name, cpu ticks, start time, rss bytes) from a /proc/<pid>/stat, or None."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        data = os.read(fd, 1024)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+    # comm may itself contain spaces and parentheses; the last ')' ends it
+    left, _, right = data.rpartition(b")")
+    fields = right.split()
+    if len(fields) < 22:
+        return None
+    # fields[0] is field 3 (state): utime 14, stime 15, starttime 22, rss 24
+    return (
+        left.partition(b"(")[2],
+        int(fields[11]) + int(fields[12]),
+        int(fields[19]),
+        int(fields[21]) * PAGE_SIZE,
+    )
+
+def drm_fdinfo(pid_dir):
+    """{drm-client-id: vram bytes} for every DRM file the process holds."""
+    clients = {}
+    fd_dir = os.path.join(pid_dir, "fd")
+    try:
+        fds = os.listdir(fd_dir)
+    except OSError:
+        return clients
+    for fd in fds:
+        try:
+            if not os.readlink(os.path.join(fd_dir, fd)).startswith("/dev/dri/"):
+                continue
+            with open(os.path.join(pid_dir, "fdinfo", fd), "r") as f:
+                info = f.read()
+        except OSError:
+            continue
+        client = None
+        vram = 0
+        for line in info.splitlines():
+            key, _, value = line.partition(":")
+            if key == "drm-client-id":
+                client = value.strip()
+            # amdgpu: drm-memory-vram; i915/xe and newer amdgpu: drm-total-<region>
+            elif key in ("drm-memory-vram", "drm-total-vram0", "drm-total-local0", "drm-total-vram"):
+                number, _, unit = value.strip().partition(" ")
+                vram = max(vram, int(number) * {"KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3}.get(unit, 1))
+        if client is not None:
+            clients[client] = vram
+    return clients
+
+class ProcessTable:
+    """
+    Process cache: pid -> [start, name, ticks, read time, rss, idle].
+    sample() returns the top processes by CPU, RSS and GPU memory.
+    """
+
+    def __init__(self, state_path=None, top=TOP_N):
+        self.state = None
+        if state_path:
+            from sysmon.cpu import StateFile
+            self.state = StateFile(state_path)
+        self.top = top
+        self.table = None
+        self.tick = 0
+        # PIDs that held a /dev/dri fd at the last full rescan
+        self.drm_pids = set()
+        self.drm_scanned = 0.0
+
+    def load(self):
+        """
+        Previous tick from the one-shot state file, doubles:
+        drm_scanned, len(drm_pids), *drm_pids, then (pid, start, ticks, read time)*
+        """
+        from array import array
+        try:
+            data = array("d", self.state.load())
+            n = int(data[1])
+            rest = data[2 + n:]
+        except (TypeError, ValueError, IndexError):
+            return
+        if len(rest) % 4:
+            return
+        self.drm_scanned = data[0]
+        self.drm_pids = {int(pid) for pid in data[2:2 + n]}
+        for i in range(0, len(rest), 4):
+            self.table[int(rest[i])] = [int(rest[i + 1]), None, int(rest[i + 2]), rest[i + 3], 0, False]
+
+    def save(self):
+        from array import array
+        data = array("d", [self.drm_scanned, len(self.drm_pids)])
+        data.extend(self.drm_pids)
+        for pid, entry in self.table.items():
+            data.extend((pid, entry[0], entry[2], entry[3]))
+        self.state.save(data.tobytes())
+
+    def gpu_clients(self, root, pids, now):
+        """pid -> GPU memory bytes from DRM fdinfo, rescanning fds on a slow cadence."""
+        if now - self.drm_scanned >= DRM_RESCAN:
+            scan = pids
+            self.drm_scanned = now
+        else:
+            scan = self.drm_pids & pids
+        used = {}
+        seen = set()
+        self.drm_pids = set()
+        for pid in scan:
+            clients = drm_fdinfo(f"{root}/{pid}")
+            if not clients:
+                continue
+            self.drm_pids.add(pid)
+            # dup()ed or inherited fds share a client id; count each client once
+            total = sum(v for c, v in clients.items() if c not in seen)
+            seen.update(clients)
+            if total:
+                used[pid] = total
+        return used
+
+    def sample(self, gpu_memory=None):
+        """
+        {"cpu": [...], "rss": [...], "gpu": [...]}, each the top N of
+        {"pid", "name", "cpu", "rss", "gpu_mem"}. gpu_memory is pid -> bytes
+        from NVML, or None to fall back to DRM fdinfo.
+        """
+        if self.table is None:
+            self.table = {}
+            if self.state:
+                self.load()
+        root = proc_root()
+        now = time.time()
+        # Resident tables skip most idle processes; one-shot runs read them all
+        skip_idle = self.state is None
+        tick = self.tick
+        self.tick += 1
+
+        procs = []
+        table = {}
+        for entry in os.scandir(root):
+            if not entry.name.isdigit():
+                continue
+            pid = int(entry.name)
+            old = self.table.get(pid)
+            if skip_idle and old is not None and old[5] and (pid + tick) % IDLE_EVERY:
+                # Used no CPU at its last read: keep the cached row this tick
+                table[pid] = old
+                procs.append((pid, old[1], 0.0, old[4]))
+                continue
+
+            stat = read_stat(f"{root}/{entry.name}/stat")
+            if stat is None:
+                continue  # exited between scandir and open
+            comm, ticks, start, rss = stat
+            if old is not None and old[0] == start:
+                name = old[1] or comm.decode(errors="replace")
+                elapsed = now - old[3]
+                cpu = (ticks - old[2]) / CLK_TCK / elapsed * 100 if elapsed > 0 else 0.0
+                idle = ticks == old[2]
+            else:
+                # New process, or a recycled PID: no previous read to compare with
+                name = comm.decode(errors="replace")
+                cpu = 0.0
+                idle = False
+            table[pid] = [start, name, ticks, now, rss, idle]
+            procs.append((pid, name, cpu, rss))
+
+        # Exited processes simply drop out of the new table
+        self.table = table
+
+        if gpu_memory is None:
+            gpu_memory = self.gpu_clients(root, set(table), now)
+        if self.state:
+            self.save()
+
+        import heapq
+        by_cpu = [p for p in heapq.nlargest(self.top, procs, key=lambda p: p[2]) if p[2] > 0]
+        by_rss = heapq.nlargest(self.top, procs, key=lambda p: p[3])
+        gpu_pids = {pid for pid, used in gpu_memory.items() if used}
+        by_gpu = heapq.nlargest(self.top, (p for p in procs if p[0] in gpu_pids), key=lambda p: gpu_memory[p[0]])
+
+        def rows(selected):
+            # Only the winners become dicts; the rest of the scan stays tuples
+            return [{"pid": pid, "name": name, "cpu": round(cpu, 1), "rss": rss, "gpu_mem": gpu_memory.get(pid, 0)}
+                    for pid, name, cpu, rss in selected]
+
+        return {"cpu": rows(by_cpu), "rss": rows(by_rss), "gpu": rows(by_gpu)}
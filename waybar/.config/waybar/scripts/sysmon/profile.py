@@ -0,0 +1,212 @@
+"""
+Opt-in timing of every collector and subprocess call.
+
+    SYSMON_PROFILE=1            (or --profile) timings section in the tooltips
+    SYSMON_PROFILE_LOG=<file>   also append one JSON line of timings per tick
+
+    python3 -m sysmon.profile [-n 50] [--sources cpu,gpu,mem,storage]
+                              [--cprofile out.prof] [--collapsed out.folded]
+
+The module form samples N ticks in-process and prints per-span median/max.
+--cprofile writes pstats data (snakeviz, `python3 -m pstats`); --collapsed
+samples every thread's stack each millisecond and writes folded stacks for
+flamegraph.pl / speedscope.
+
+While disabled, span() hands back one shared no-op context manager, so the
+instrumented code costs a function call and nothing is recorded.
+"""
+import os
+import time
+
+enabled = bool(os.environ.get("SYSMON_PROFILE"))
+
+# Span name -> ms spent in it during the current tick. Workers write
+# different names, so plain dict updates under the GIL are enough.
+tick = {}
+
+class Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        tick[self.name] = tick.get(self.name, 0.0) + (time.perf_counter() - self.start) * 1000
+        return False
+
+class NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NO_SPAN = NoSpan()
+
+def enable():
+    global enabled
+    enabled = True
+
+def span(name):
+    """`with span("cpu.sensors"):` adds the block's time to this tick."""
+    return Span(name) if enabled else NO_SPAN
+
+def timed(name, fn):
+    """fn wrapped in span(name), or fn itself while profiling is off."""
+    if not enabled:
+        return fn
+
+    def wrapper(*args, **kwargs):
+        with Span(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+def take():
+    """Timings of the tick that just ended (and logs them); starts the next one."""
+    global tick
+    timings, tick = tick, {}
+    path = os.environ.get("SYSMON_PROFILE_LOG")
+    if path and timings:
+        import json
+        import sys
+        try:
+            with open(path, "a") as f:
+                f.write(json.dumps({
+                    "time": time.time(),
+                    "script": os.path.basename(sys.argv[0]),
+                    "timings": {k: round(v, 3) for k, v in timings.items()},
+                }) + "\n")
+        except OSError:
+            pass
+    return timings
+
+def tooltip_lines(timings):
+    """Tooltip section, slowest span first ([] without timings)."""
+    if not timings:
+        return []
+    lines = ["<b>Timings</b>"]
+    for name, ms in sorted(timings.items(), key=lambda kv: -kv[1]):
+        lines.append(f"<tt>{name[:24]:<24} {ms:7.2f} ms</tt>")
+    return lines
+
+# ---------------------------------------------------
+# OFFLINE PROFILING (python3 -m sysmon.profile)
+# ---------------------------------------------------
+
+class StackSampler:
+    """Folded stacks of every other thread, sampled every `period` seconds."""
+
+    def __init__(self, period=0.001):
+        import threading
+        self.period = period
+        self.counts = {}
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        import sys
+        import threading
+        me = threading.get_ident()
+        while not self.stop.wait(self.period):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+        return False
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+def main():
+    import contextlib
+    import sys
+    from sysmon.collector import ALL_SOURCES, Collector
+
+    args = sys.argv[1:]
+
+    def option(name, default):
+        if name in args:
+            i = args.index(name)
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        return default
+
+    runs = int(option("-n", 50))
+    sources = tuple(option("--sources", ",".join(ALL_SOURCES)).split(","))
+    cprofile = option("--cprofile", None)
+    collapsed = option("--collapsed", None)
+    if args:
+        print(__doc__.strip(), file=sys.stderr)
+        sys.exit(2)
+
+    enable()
+    collector = Collector(sources=sources, resident=True)
+    collector.sample()  # first tick opens backends and workers
+    take()
+
+    if cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        # cProfile only sees its own thread, so call each source inline
+        calls = [timed(name, getattr(collector, f"sample_{name}")) for name in sources]
+
+        def sample():
+            for call in calls:
+                call()
+            return take()
+    else:
+        profiler = None
+
+        def sample():
+            return collector.sample()["timings"]
+
+    spans = {}
+    sampler = StackSampler() if collapsed else contextlib.nullcontext()
+    with sampler:
+        if profiler:
+            profiler.enable()
+        for _ in range(runs):
+            for name, ms in sample().items():
+                spans.setdefault(name, []).append(ms)
+        if profiler:
+            profiler.disable()
+
+    print(f"{'span':<28} {'ticks':>6} {'median ms':>10} {'max ms':>10}")
+    for name, values in sorted(spans.items(), key=lambda kv: -max(kv[1])):
+        values.sort()
+        print(f"{name[:28]:<28} {len(values):>6} {values[len(values) // 2]:>10.2f} {values[-1]:>10.2f}")
+    if profiler:
+        profiler.dump_stats(cprofile)
+        print(f"cProfile stats: {cprofile}")
+    if collapsed:
+        sampler.write(collapsed)
+        print(f"collapsed stacks: {collapsed}")
+
+if __name__ == "__main__":
+    # Run main() from the imported module, whose `enabled` and `tick` the
+    # collector sees, not from this __main__ copy
+    from sysmon.profile import main
+    main()
@@ -0,0 +1,216 @@
+"""
+Fixed-layout binary ring of recent snapshots, mapped from a file under
+$XDG_RUNTIME_DIR, so other consumers (tmux status, rofi, notification rules)
+can read the latest values without sampling again or parsing JSON.
+
+    python3 -m sysmon.ring [N]      print the latest N records (default 1)
+
+Layout: HEADER, then `capacity` slots of RECORD. The header's `written` is
+the number of records ever written; record n lives in slot n % capacity.
+Each slot starts with its own sequence number (seqlock): odd while the
+writer is inside it, 2 * (n + 1) once record n is complete. A reader that
+sees an odd or changed sequence, or one that belongs to a different n,
+knows the slot was torn or overwritten and retries or skips it.
+"""
+import math
+import os
+import struct
+from collections import namedtuple
+
+from sysmon.cpu import state_path
+
+MAGIC = b"SMRING1\0"
+# magic, record size, capacity, records written
+HEADER = struct.Struct("=8sIIQ")
+# Five minutes at the default 2 s tick
+DEFAULT_CAPACITY = 150
+
+# (field, struct code). seq must stay first. Missing values are NaN.
+FIELDS = [
+    ("seq", "Q"),
+    ("time", "d"),               # unix time of the sample
+    ("stale", "I"),              # bit per source (STALE_BITS) that missed its deadline
+    ("cpu_usage", "f"),          # %
+    ("cpu_temp", "f"),           # °C
+    ("cpu_freq", "f"),           # MHz
+    ("gpu_usage", "f"),          # %, NaN without a GPU
+    ("gpu_temp", "f"),           # °C
+    ("gpu_power", "f"),          # W
+    ("gpu_freq", "f"),           # MHz
+    ("mem_used", "Q"),           # bytes
+    ("mem_total", "Q"),
+    ("mem_percent", "f"),
+    ("swap_used", "Q"),
+    ("swap_total", "Q"),
+    ("swap_percent", "f"),
+    ("storage_used", "d"),       # GB, as in the snapshot
+    ("storage_total", "d"),
+    ("storage_percent", "f"),
+    ("net_rx", "d"),             # bytes/s over every shown interface
+    ("net_tx", "d"),
+]
+RECORD = struct.Struct("=" + "".join(code for _, code in FIELDS))
+SEQ = struct.Struct("=Q")
+Record = namedtuple("Record", [name for name, _ in FIELDS])
+
+STALE_BITS = {"cpu": 1, "gpu": 2, "mem": 4, "storage": 8, "procs": 16, "net": 32}
+
+NAN = float("nan")
+
+def ring_path():
+    """$XDG_RUNTIME_DIR/waybar-sysmon/metrics.ring"""
+    return state_path("metrics.ring")
+
+def file_length(capacity):
+    return HEADER.size + RECORD.size * capacity
+
+def slot_offset(n, capacity):
+    return HEADER.size + RECORD.size * (n % capacity)
+
+def num(value):
+    return NAN if value is None else value
+
+def pack_values(snap):
+    """The RECORD fields after seq, straight from a collector snapshot."""
+    cpu = snap.get("cpu") or {}
+    gpu = snap.get("gpu") or {}
+    mem = snap.get("mem") or {}
+    storage = snap.get("storage") or {}
+    net = snap.get("net") or {}
+    stale = 0
+    for name in snap.get("stale", []):
+        stale |= STALE_BITS.get(name, 0)
+    return (
+        snap.get("time", 0.0),
+        stale,
+        num(cpu.get("usage")), num(cpu.get("temp")), num(cpu.get("freq_c")),
+        num(gpu.get("usage")), num(gpu.get("temp")), num(gpu.get("power")), num(gpu.get("freq_c")),
+        int(mem.get("used", 0)), int(mem.get("total", 0)), num(mem.get("percent")),
+        int(mem.get("swap_used", 0)), int(mem.get("swap_total", 0)), num(mem.get("swap_percent")),
+        num(storage.get("used")), num(storage.get("total")), num(storage.get("percent")),
+        num(net.get("rx")), num(net.get("tx")),
+    )
+
+# ---------------------------------------------------
+# WRITER
+# ---------------------------------------------------
+
+class RingWriter:
+    """
+    Appends one record per snapshot. The file is created (or reset, if the
+    layout changed) on open and stays mapped for the life of the writer.
+    sysmond and one-shot sys_monitor runs may share the file; an flock
+    around the open-time layout check and each append keeps two writers
+    from resetting the ring under each other or claiming the same slot.
+    """
+
+    def __init__(self, path=None, capacity=DEFAULT_CAPACITY):
+        import fcntl
+        import mmap
+        self.path = path or ring_path()
+        self.capacity = capacity
+        length = file_length(capacity)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        # Same lock as append(): a writer opening the file at the same moment
+        # must not resize or zero it under a record being written
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self.fd).st_size != length:
+                os.ftruncate(self.fd, length)
+            self.mm = mmap.mmap(self.fd, length)
+
+            magic, size, old_capacity, _ = HEADER.unpack_from(self.mm, 0)
+            if (magic, size, old_capacity) != (MAGIC, RECORD.size, capacity):
+                # New file, or written by a different layout: readers see it empty
+                self.mm[:length] = bytes(length)
+                HEADER.pack_into(self.mm, 0, MAGIC, RECORD.size, capacity, 0)
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def append(self, snap):
+        import fcntl
+        values = pack_values(snap)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            n = HEADER.unpack_from(self.mm, 0)[3]
+            offset = slot_offset(n, self.capacity)
+            SEQ.pack_into(self.mm, offset, 2 * n + 1)
+            RECORD.pack_into(self.mm, offset, 2 * n + 1, *values)
+            SEQ.pack_into(self.mm, offset, 2 * n + 2)
+            HEADER.pack_into(self.mm, 0, MAGIC, RECORD.size, self.capacity, n + 1)
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def close(self):
+        self.mm.close()
+        os.close(self.fd)
+
+# ---------------------------------------------------
+# READER
+# ---------------------------------------------------
+
+class RingReader:
+    """
+    Read-only mapping of the ring. Records are unpacked directly from the
+    shared mapping; nothing is copied out of it first and no JSON is involved.
+    """
+
+    def __init__(self, path=None):
+        import mmap
+        self.path = path or ring_path()
+        with open(self.path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, prot=mmap.PROT_READ)
+        magic, size, self.capacity, _ = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or size != RECORD.size:
+            self.mm.close()
+            raise ValueError(f"{self.path}: not a metrics ring this version understands")
+
+    def written(self):
+        """Number of records ever written (the index of the next one)."""
+        return HEADER.unpack_from(self.mm, 0)[3]
+
+    def read(self, n, retries=3):
+        """Record n, or None if it was torn by a writer or already overwritten."""
+        offset = slot_offset(n, self.capacity)
+        want = 2 * n + 2
+        for _ in range(retries):
+            record = RECORD.unpack_from(self.mm, offset)
+            # Sequence must be complete before and after the unpack
+            if record[0] == want and SEQ.unpack_from(self.mm, offset)[0] == want:
+                return Record._make(record)
+            if record[0] > want:
+                return None  # lapped
+        return None
+
+    def latest(self, count=1):
+        """Up to `count` most recent complete records, oldest first."""
+        end = self.written()
+        start = max(0, end - min(count, self.capacity))
+        records = (self.read(n) for n in range(start, end))
+        return [r for r in records if r is not None]
+
+    def close(self):
+        self.mm.close()
+
+def main():
+    import sys
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    try:
+        reader = RingReader()
+    except (OSError, ValueError) as e:
+        print(f"sysmon.ring: {e}", file=sys.stderr)
+        sys.exit(1)
+    for r in reader.latest(count):
+        stale = [name for name, bit in STALE_BITS.items() if r.stale & bit]
+        gpu = "GPU n/a" if math.isnan(r.gpu_usage) else f"GPU {r.gpu_usage:.0f}% {r.gpu_temp:.0f}°C {r.gpu_power:.1f}W"
+        print(
+            f"{r.time:.1f}  CPU {r.cpu_usage:.1f}% {r.cpu_temp:.0f}°C  {gpu}  "
+            f"RAM {r.mem_percent:.0f}%  Disk {r.storage_percent:.0f}%  "
+            f"Net {r.net_rx / 1e3:.0f}/{r.net_tx / 1e3:.0f} kB/s"
+            + (f"  stale: {','.join(stale)}" if stale else "")
+        )
+    reader.close()
+
+if __name__ == "__main__":
+    main()
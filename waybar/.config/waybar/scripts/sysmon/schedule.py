@@ -0,0 +1,123 @@
+"""
+Adaptive tick length for the resident loops (sysmond, and the --stream
+mode of cpu_info and net_info, which share stream() below).
+
+While the headline numbers move, ticks come every `fast` seconds. Each tick
+on which none of them moved by more than its tolerance doubles the wait,
+up to `slow`; the first tick that sees a real change drops straight back
+to `fast`. An idle laptop then wakes every `slow` seconds instead of every
+2, and a load spike is still picked up within one slow tick.
+"""
+import math
+
+# Metric -> change (in its display unit) that counts as movement
+TOLERANCES = {
+    "cpu.usage": 2.0,
+    "cpu.temp": 1.0,
+    "gpu.usage": 2.0,
+    "gpu.temp": 1.0,
+    "mem.percent": 0.5,
+    "mem.psi": 1.0,
+    # kB/s; below this the bar's rounded rate barely changes
+    "net.rx": 50.0,
+    "net.tx": 50.0,
+}
+
+def headline(snap):
+    """{metric: value} of the numbers the bar shows, from a collector snapshot."""
+    values = {}
+    cpu = snap.get("cpu")
+    if cpu and cpu.get("usages"):
+        values["cpu.usage"] = cpu["usage"]
+        values["cpu.temp"] = cpu["temp"]
+    gpu = snap.get("gpu")
+    if gpu:
+        values["gpu.usage"] = gpu["usage"]
+        values["gpu.temp"] = gpu["temp"]
+    mem = snap.get("mem")
+    if mem and mem.get("total"):
+        values["mem.percent"] = mem["percent"]
+        if mem.get("psi_memory") is not None:
+            values["mem.psi"] = mem["psi_memory"]
+    net = snap.get("net")
+    if net:
+        values["net.rx"] = net["rx"] / 1e3
+        values["net.tx"] = net["tx"] / 1e3
+    return values
+
+class Cadence:
+    """Exponential backoff between `fast` and `slow` seconds, reset on movement."""
+
+    def __init__(self, fast=2.0, slow=16.0, factor=2.0, tolerances=None):
+        self.fast = fast
+        self.slow = max(fast, slow)
+        self.factor = factor
+        self.tolerances = tolerances or TOLERANCES
+        self.interval = fast
+        self.last = None
+
+    def moved(self, values):
+        """True if any metric changed by more than its tolerance (or appeared/vanished)."""
+        last = self.last
+        if last is None or last.keys() != values.keys():
+            return True
+        for name, value in values.items():
+            old = last[name]
+            if isinstance(value, float) and math.isnan(value):
+                continue
+            if abs(value - old) > self.tolerances.get(name, 0):
+                return True
+        return False
+
+    def reset(self):
+        """Back to the fast tick (e.g. a PSI trigger fired)."""
+        self.interval = self.fast
+
+    def update(self, snap):
+        """Seconds to wait before the next tick, given this tick's snapshot."""
+        values = headline(snap)
+        if self.moved(values):
+            # Compare against the value that triggered the change, so a
+            # slow drift still adds up to a reset
+            self.last = values
+            self.interval = self.fast
+        else:
+            self.interval = min(self.slow, self.interval * self.factor)
+        return self.interval
+
+# ---------------------------------------------------
+# --stream
+# ---------------------------------------------------
+
+def stream_intervals(argv, interval=2.0, max_interval=16.0):
+    """(fast, slow) tick from --interval N / --max-interval M in `argv`."""
+    if "--interval" in argv:
+        interval = float(argv[argv.index("--interval") + 1])
+    if "--max-interval" in argv:
+        max_interval = float(argv[argv.index("--max-interval") + 1])
+    return interval, max(interval, max_interval)
+
+def stream(sources, render, interval=2.0, max_interval=16.0):
+    """
+    Resident mode of a single-module script: one Collector over `sources`
+    that keeps its counters (and sockets) open, printing render(snap) as a
+    JSON line whenever it changes. Use with waybar without an 'interval'.
+    Returns when waybar goes away (closed pipe) or on Ctrl-C.
+    """
+    import json
+    import time
+    from sysmon.collector import Collector
+    collector = Collector(sources=sources, resident=True)
+    cadence = Cadence(interval, max_interval)
+    last = None
+    try:
+        while True:
+            snap = collector.sample()
+            line = json.dumps(render(snap))
+            # Nothing visible changed: don't make waybar redraw
+            if line != last:
+                print(line, flush=True)
+                last = line
+            time.sleep(cadence.update(snap))
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
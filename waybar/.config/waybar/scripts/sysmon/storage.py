@@ -0,0 +1,365 @@
+import os
+import time
+
+from sysmon import proc_root, profile, sysfs_root
+
+# Partitions to ignore
+EXCLUDE_TYPES = ['squashfs', 'tracefs', 'overlay', 'tmpfs', 'devtmpfs']
+EXCLUDE_MOUNTS = ['/boot', '/boot/efi', '/run', '/dev']
+# Shown even though the kernel lists them as 'nodev'; these are the ones that hang
+NETWORK_TYPES = ['nfs', 'nfs4', 'cifs', 'smb3', 'fuse.sshfs', 'fuse.rclone', '9p']
+
+# Seconds one statvfs may take before the mount shows its last value
+STAT_TIMEOUT = 0.3
+# Slow mounts (network, FUSE, or ever timed out) refresh every N ticks
+SLOW_EVERY = 15
+# I/O fields of mounts without a block device (network, zfs)
+NO_IO = {"read_bps": None, "write_bps": None, "iops": None, "latency_ms": None, "util": None}
+
+def block_fstypes():
+    """Filesystems backed by a device (what psutil.disk_partitions() keeps)."""
+    types = {"zfs"}
+    try:
+        with open(os.path.join(proc_root(), "filesystems"), "r") as f:
+            for line in f:
+                if not line.startswith("nodev"):
+                    types.add(line.strip())
+    except OSError:
+        pass
+    return types
+
+def unescape(field):
+    """mountinfo escapes space, tab, newline and backslash as octal."""
+    if "\\" not in field:
+        return field
+    import re
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), field)
+
+def parse_mountinfo(text, fstypes):
+    """[(mountpoint, fstype, block device name or None), ...] for the partitions the monitor shows."""
+    mounts = []
+    for line in text.splitlines():
+        # id parent major:minor root mountpoint opts [optional...] - fstype source superopts
+        left, _, right = line.partition(" - ")
+        fields = left.split()
+        fstype, _, rest = right.partition(" ")
+        if len(fields) < 5:
+            continue
+        mountpoint = unescape(fields[4])
+        if fstype not in fstypes and fstype not in NETWORK_TYPES:
+            continue
+        if fstype in EXCLUDE_TYPES or any(mountpoint.startswith(x) for x in EXCLUDE_MOUNTS):
+            continue
+        mounts.append((mountpoint, fstype, block_device(unescape(rest.split(" ", 1)[0]), fields[2])))
+    return mounts
+
+# ---------------------------------------------------
+# BLOCK DEVICES (/proc/diskstats, NVMe hwmon)
+# ---------------------------------------------------
+SECTOR = 512
+
+def block_device(source, devno):
+    """
+    Kernel name (nvme0n1p2, dm-0) of a mount's device. The source path works
+    for btrfs, whose major:minor is anonymous; otherwise /sys/dev/block.
+    """
+    if source.startswith("/dev/"):
+        # /dev/mapper/root -> dm-0
+        return os.path.basename(os.path.realpath(source))
+    link = os.path.join(sysfs_root(), "dev", "block", devno)
+    if os.path.exists(link):
+        return os.path.basename(os.path.realpath(link))
+    return None  # zfs, network and FUSE mounts
+
+def whole_disk(name):
+    """nvme0n1p2 -> nvme0n1; dm-0 -> the disk under its first slave (LUKS, LVM)."""
+    block = os.path.join(sysfs_root(), "class", "block")
+    for _ in range(4):  # dm on dm on a partition is as deep as it gets
+        path = os.path.realpath(os.path.join(block, name))
+        if os.path.exists(os.path.join(path, "partition")):
+            return os.path.basename(os.path.dirname(path))
+        try:
+            slaves = sorted(os.listdir(os.path.join(path, "slaves")))
+        except OSError:
+            return name
+        if not slaves:
+            return name
+        name = slaves[0]
+    return name
+
+def nvme_temp_path(disk):
+    """Composite temperature of an NVMe disk's controller (nvme hwmon), or None."""
+    if not disk.startswith("nvme"):
+        return None  # drivetemp can spin a sleeping SATA disk up
+    ctrl = os.path.realpath(os.path.join(sysfs_root(), "class", "block", disk, "device"))
+    # nvme0/hwmonN since 5.12; the PCI function's hwmon/hwmonN before that
+    for parent in (ctrl, os.path.join(ctrl, "device", "hwmon")):
+        try:
+            hwmons = sorted(e for e in os.listdir(parent) if e.startswith("hwmon"))
+        except OSError:
+            continue
+        for hwmon in hwmons:
+            path = os.path.join(parent, hwmon, "temp1_input")
+            if os.path.exists(path):
+                return path
+    return None
+
+class DiskStats:
+    """
+    Per-device I/O rates from one pread of /proc/diskstats per tick, against
+    the previous tick's counters (kept in memory, or in a small state file
+    for one-shot runs, like CpuSampler).
+    """
+    # Counter columns after major, minor, name: reads, sectors read, ms reading,
+    # writes, sectors written, ms writing, ms doing I/O
+    COLUMNS = (0, 2, 3, 4, 6, 7, 9)
+
+    def __init__(self, state_path=None):
+        from sysmon.cpu import StateFile
+        self.state = StateFile(state_path) if state_path else None
+        self.fd = os.open(os.path.join(proc_root(), "diskstats"), os.O_RDONLY)
+        self.prev = None
+
+    def read(self, names):
+        """{name: [counters...]} for the wanted devices, from one read."""
+        chunks = []
+        offset = 0
+        while True:
+            chunk = os.pread(self.fd, 65536, offset)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            offset += len(chunk)
+        counters = {}
+        for line in b"".join(chunks).decode().splitlines():
+            fields = line.split()
+            if len(fields) >= 14 and fields[2] in names:
+                counters[fields[2]] = [int(fields[3 + i]) for i in self.COLUMNS]
+        return counters
+
+    def load(self):
+        data = self.state.load()
+        try:
+            when, *lines = data.decode().splitlines()
+            return float(when), {name: [int(x) for x in rest] for name, *rest in (l.split() for l in lines)}
+        except (AttributeError, ValueError):
+            return None
+
+    def save(self, when, counters):
+        lines = [f"{when}\n"] + [name + " " + " ".join(map(str, values)) + "\n" for name, values in counters.items()]
+        self.state.save("".join(lines).encode())
+
+    def sample(self, names):
+        """{name: {"read_bps", "write_bps", "iops", "latency_ms", "util"}}; zeros on the first tick."""
+        now = time.time()
+        with profile.span("storage.diskstats"):
+            counters = self.read(names)
+        prev = self.prev
+        if prev is None and self.state:
+            prev = self.load()
+        self.prev = (now, counters)
+        if self.state:
+            self.save(now, counters)
+
+        rates = {}
+        elapsed = now - prev[0] if prev else 0
+        for name, curr in counters.items():
+            old = prev[1].get(name) if prev else None
+            if old is None or elapsed <= 0 or any(c < o for c, o in zip(curr, old)):
+                # First sight, or counters reset (device re-attached)
+                rates[name] = {"read_bps": 0, "write_bps": 0, "iops": 0, "latency_ms": 0, "util": 0}
+                continue
+            d = [c - o for c, o in zip(curr, old)]
+            ios = d[0] + d[3]
+            rates[name] = {
+                "read_bps": d[1] * SECTOR / elapsed,
+                "write_bps": d[4] * SECTOR / elapsed,
+                "iops": ios / elapsed,
+                # Average time per completed request, queueing included
+                "latency_ms": (d[2] + d[5]) / ios if ios else 0,
+                "util": min(100.0, d[6] / (elapsed * 1000) * 100),
+            }
+        return rates
+
+    def close(self):
+        os.close(self.fd)
+
+def display_name(mountpoint):
+    """Root, Home, or folder name."""
+    if mountpoint == "/": return "Root ( / )"
+    if mountpoint == "/home": return "Home"
+    return os.path.basename(mountpoint).capitalize() or "Data"
+
+class StorageMonitor:
+    """
+    Keeps the partition list until /proc/self/mountinfo signals a change
+    (POLLPRI), instead of re-listing mounts on every tick. Each statvfs runs
+    on its own worker with STAT_TIMEOUT; a mount that misses it keeps its
+    last usage, is marked stale and from then on refreshes on the slow cadence
+    together with network and FUSE mounts.
+    """
+
+    def __init__(self, mountinfo=None, state_path=None):
+        import select
+        mountinfo = mountinfo or os.path.join(proc_root(), "self", "mountinfo")
+        self.fstypes = block_fstypes()
+        self.fd = os.open(mountinfo, os.O_RDONLY)
+        self.poller = select.poll()
+        self.poller.register(self.fd, select.POLLPRI | select.POLLERR)
+        self.mounts = None
+        self.workers = {}
+        self.last = {}
+        self.slow = set()
+        self.tick = 0
+        # Mount -> block device, disk -> open NVMe temperature file
+        self.devices = {}
+        self.temp_fds = {}
+        self.disk_of = {}
+        try:
+            self.diskstats = DiskStats(state_path)
+        except OSError:
+            self.diskstats = None
+
+    def mounts_changed(self):
+        """True on the first call and whenever the mount table changed since the last poll."""
+        import select
+        events = self.poller.poll(0)
+        return self.mounts is None or any(ev & select.POLLPRI for _, ev in events)
+
+    def read_mounts(self):
+        chunks = []
+        offset = 0
+        while True:
+            chunk = os.pread(self.fd, 65536, offset)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            offset += len(chunk)
+        return parse_mountinfo(b"".join(chunks).decode(errors="replace"), self.fstypes)
+
+    def refresh_mounts(self):
+        with profile.span("storage.mountinfo"):
+            self.mounts = self.read_mounts()
+        current = {mp for mp, _, _ in self.mounts}
+        self.devices = {}
+        for mp, fstype, device in self.mounts:
+            if fstype in NETWORK_TYPES or fstype.startswith("fuse"):
+                self.slow.add(mp)
+            if device:
+                self.devices[mp] = device
+                self.open_temp(device)
+        # Forget unmounted paths (a still-hung worker thread just ends on its own)
+        for mp in list(self.workers):
+            if mp not in current:
+                del self.workers[mp]
+                self.last.pop(mp, None)
+                self.slow.discard(mp)
+
+    def open_temp(self, device):
+        """Resolves (once per device) and opens the NVMe temperature behind a device."""
+        if device in self.disk_of:
+            return
+        disk = self.disk_of[device] = whole_disk(device)
+        if disk in self.temp_fds:
+            return
+        path = nvme_temp_path(disk)
+        try:
+            self.temp_fds[disk] = os.open(path, os.O_RDONLY) if path else None
+        except OSError:
+            self.temp_fds[disk] = None
+
+    def read_temps(self):
+        """disk -> °C for every open NVMe sensor."""
+        temps = {}
+        for disk, fd in self.temp_fds.items():
+            if fd is None:
+                continue
+            try:
+                temps[disk] = int(os.pread(fd, 32, 0)) / 1000.0
+            except (OSError, ValueError):
+                pass
+        return temps
+
+    def worker(self, mountpoint):
+        if mountpoint not in self.workers:
+            from sysmon.workers import SourceWorker
+            stat = profile.timed(f"statvfs {mountpoint}", lambda: os.statvfs(mountpoint))
+            self.workers[mountpoint] = SourceWorker(f"statvfs:{mountpoint}", stat)
+        return self.workers[mountpoint]
+
+    def sample(self):
+        if self.mounts_changed():
+            self.refresh_mounts()
+
+        # Kick every due statvfs first so they all run in parallel
+        due = []
+        for mp, _, _ in self.mounts:
+            if mp in self.slow and mp in self.last and self.tick % SLOW_EVERY:
+                continue
+            self.worker(mp).kick()
+            due.append(mp)
+        self.tick += 1
+
+        deadline = time.monotonic() + STAT_TIMEOUT
+        stale = set()
+        for mp in due:
+            worker = self.workers[mp]
+            if worker.wait(deadline - time.monotonic()) and worker.error is None:
+                self.last[mp] = worker.result
+            else:
+                # Timed out (or failed): slow from now on
+                self.slow.add(mp)
+                stale.add(mp)
+
+        io = self.diskstats.sample(set(self.devices.values())) if self.diskstats else {}
+        temps = self.read_temps()
+
+        entries = []
+        total_cap = 0
+        total_used = 0
+        for mp, _, _ in self.mounts:
+            st = self.last.get(mp)
+            if st is None or st.f_blocks == 0:
+                continue
+            # Same arithmetic as psutil.disk_usage()
+            total = st.f_blocks * st.f_frsize
+            used = (st.f_blocks - st.f_bfree) * st.f_frsize
+            avail = st.f_bavail * st.f_frsize
+            percent = round(used / (used + avail) * 100, 1) if used + avail else 0
+
+            # Convert to TB/GB logic TB: 1e12 GB: 1e9
+            total_tb = total / 1e9
+            used_tb = used / 1e9
+
+            total_cap += total_tb
+            total_used += used_tb
+
+            device = self.devices.get(mp)
+            entries.append(dict({
+                "name": display_name(mp),
+                "total": total_tb,
+                "used": used_tb,
+                "percent": percent,
+                "temp": temps.get(self.disk_of.get(device)),
+                "stale": mp in stale,
+                "device": device,
+            }, **io.get(device, NO_IO)))
+
+        overall_percent = (total_used / total_cap * 100) if total_cap > 0 else 0
+        return entries, total_used, total_cap, overall_percent
+
+    def close(self):
+        os.close(self.fd)
+        if self.diskstats:
+            self.diskstats.close()
+        for fd in self.temp_fds.values():
+            if fd is not None:
+                os.close(fd)
+
+def get_storage_info():
+    """Scans mounted partitions excluding loops and snaps."""
+    monitor = StorageMonitor()
+    try:
+        return monitor.sample()
+    finally:
+        monitor.close()
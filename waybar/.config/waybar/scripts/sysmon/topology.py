@@ -0,0 +1,254 @@
+"""
+CPU topology and the temperature sensor behind each logical CPU.
+
+resolve() reads /sys/devices/system/cpu/cpu*/topology and the hwmon chips
+once and returns a plain dict (kept in the identity cache), mapping every
+thread to the sensor file closest to it:
+
+  Intel coretemp     'Core N' of the thread's own core, per package. Core IDs
+                     come from sysfs, so hybrid P/E-core parts (sparse core IDs)
+                     and non-adjacent SMT siblings (cpu0/cpu8) map correctly.
+  AMD k10temp        'TccdN' of the CCD the thread sits on (CCDs are told apart
+  / zenpower         by L3 cache ID), one chip per socket; Tdie/Tctl otherwise.
+  anything else      the first temperature of a known board/SoC chip.
+
+ThermalReader keeps those files open, so each tick is one pread per distinct
+sensor; psutil.sensors_temperatures() would rescan every hwmon chip instead.
+"""
+import os
+
+from sysmon import sysfs_root
+
+def read_int(path):
+    try:
+        with open(path, "r") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def read_text(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def cpu_topology(root=None):
+    """
+    [{"cpu", "package", "die", "core", "siblings"}, ...] for every online CPU,
+    in cpu number order (the order of the cpuN lines in /proc/stat).
+    """
+    base = os.path.join(root or sysfs_root(), "devices", "system", "cpu")
+    try:
+        names = os.listdir(base)
+    except OSError:
+        return []
+    threads = []
+    for name in names:
+        if not (name.startswith("cpu") and name[3:].isdigit()):
+            continue
+        topo = os.path.join(base, name, "topology")
+        # Offline CPUs have no topology directory
+        core = read_int(os.path.join(topo, "core_id"))
+        if core is None:
+            continue
+        threads.append({
+            "cpu": int(name[3:]),
+            "package": read_int(os.path.join(topo, "physical_package_id")) or 0,
+            "die": read_int(os.path.join(topo, "die_id")) or 0,
+            "core": core,
+            "siblings": read_text(os.path.join(topo, "thread_siblings_list")) or name[3:],
+            # L3 domain: one per CCD on Zen 3 and later, two per CCD on Zen 2
+            "l3": read_int(os.path.join(base, name, "cache", "index3", "id")),
+        })
+    threads.sort(key=lambda t: t["cpu"])
+    return threads
+
+def hwmon_chips(root=None):
+    """[(driver name, hwmon dir), ...] sorted by hwmon number."""
+    base = os.path.join(root or sysfs_root(), "class", "hwmon")
+    try:
+        entries = os.listdir(base)
+    except OSError:
+        return []
+    chips = []
+    for entry in sorted(entries, key=lambda e: int(e[5:]) if e[5:].isdigit() else 0):
+        path = os.path.join(base, entry)
+        name = read_text(os.path.join(path, "name"))
+        if name:
+            chips.append((name, path))
+    return chips
+
+def temp_labels(chip):
+    """{label: temp input path} for every tempN_label of a hwmon chip."""
+    sensors = {}
+    try:
+        files = os.listdir(chip)
+    except OSError:
+        return sensors
+    for f in files:
+        if f.startswith("temp") and f.endswith("_label"):
+            label = read_text(os.path.join(chip, f))
+            if label:
+                sensors[label] = os.path.join(chip, f[:-len("_label")] + "_input")
+    return sensors
+
+def chip_package(chip):
+    """Package number of a coretemp chip, from its platform device (coretemp.N)."""
+    device = os.path.basename(os.path.realpath(os.path.join(chip, "device")))
+    _, _, number = device.rpartition(".")
+    return int(number) if number.isdigit() else 0
+
+def coretemp_sensors(chips):
+    """({(package, core_id): path}, {package: path}) from the Intel coretemp chips."""
+    cores = {}
+    packages = {}
+    for name, chip in chips:
+        if name != "coretemp":
+            continue
+        package = chip_package(chip)
+        for label, path in temp_labels(chip).items():
+            if label.startswith("Core "):
+                cores[(package, int(label[5:]))] = path
+            elif label.startswith("Package id "):
+                packages[int(label[11:])] = path
+    return cores, packages
+
+def ccd_of(threads, n_ccds):
+    """
+    {cpu: CCD index} for one socket's threads. L3 domains are ranked and
+    spread evenly over the Tccd sensors (two CCXs per CCD on Zen 2); without
+    cache IDs, core IDs are spread the same way.
+    """
+    key = "l3" if all(t["l3"] is not None for t in threads) else "core"
+    domains = sorted({t[key] for t in threads})
+    rank = {d: i for i, d in enumerate(domains)}
+    return {t["cpu"]: rank[t[key]] * n_ccds // len(domains) for t in threads}
+
+def amd_sensors(chips, threads):
+    """
+    Thread map from k10temp / zenpower: one chip per socket, in PCI order.
+    Threads get their CCD's Tccd, or the socket's Tdie/Tctl without one.
+    """
+    amd = [chip for name, chip in chips if name in ("k10temp", "zenpower")]
+    if not amd:
+        return None
+    amd.sort(key=lambda chip: os.path.basename(os.path.realpath(os.path.join(chip, "device"))))
+
+    packages = []
+    dies = []
+    by_cpu = {}
+    sockets = sorted({t["package"] for t in threads}) or [0]
+    for socket, chip in zip(sockets, amd):
+        labels = temp_labels(chip)
+        # Tdie is Tctl without the fan-curve offset some models add
+        package = labels.get("Tdie") or labels.get("Tctl") or next(iter(labels.values()), None)
+        if package:
+            packages.append(package)
+        ccds = sorted((l for l in labels if l.startswith("Tccd") and l[4:].isdigit()), key=lambda l: int(l[4:]))
+        for label in ccds:
+            name = "CCD" + label[4:]
+            dies.append([f"S{socket} {name}" if len(amd) > 1 else name, labels[label]])
+
+        mine = [t for t in threads if t["package"] == socket]
+        if ccds and mine:
+            for cpu, ccd in ccd_of(mine, len(ccds)).items():
+                by_cpu[cpu] = labels[ccds[ccd]]
+        else:
+            for t in mine:
+                by_cpu[t["cpu"]] = package
+    return {
+        "packages": packages,
+        "threads": [by_cpu.get(t["cpu"]) for t in threads],
+        "dies": dies,
+    }
+
+def intel_sensors(chips, threads):
+    """Thread map from coretemp: each thread reads its own core."""
+    cores, packages = coretemp_sensors(chips)
+    if not cores:
+        return None
+    dies = []
+    # Dual socket: each package is worth its own line
+    if len(packages) > 1:
+        dies = [[f"Package {p}", packages[p]] for p in sorted(packages)]
+    return {
+        "packages": [packages[p] for p in sorted(packages)],
+        "threads": [cores.get((t["package"], t["core"]), packages.get(t["package"])) for t in threads],
+        "dies": dies,
+    }
+
+# Board / SoC chips whose first temperature is the CPU's
+FALLBACK_CHIPS = ["asus", "cpu_thermal", "soc_thermal", "acpitz"]
+
+def fallback_sensors(chips, threads):
+    """One package-wide sensor from a known chip, for every thread."""
+    for wanted in FALLBACK_CHIPS:
+        for name, chip in chips:
+            if name == wanted:
+                path = os.path.join(chip, "temp1_input")
+                if os.path.exists(path):
+                    return {"packages": [path], "threads": [path] * len(threads), "dies": []}
+    return None
+
+def resolve(root=None):
+    """
+    {"packages": [path, ...], "threads": [path or None per thread],
+     "dies": [[label, path], ...]}, or None without any CPU temperature sensor.
+    """
+    chips = hwmon_chips(root)
+    threads = cpu_topology(root)
+    for find in (intel_sensors, amd_sensors, fallback_sensors):
+        mapping = find(chips, threads)
+        if mapping:
+            return mapping
+    return None
+
+class ThermalReader:
+    """
+    Keeps every sensor file of a resolve() map open. sample() is one pread
+    per distinct file and a list lookup per thread.
+    """
+
+    def __init__(self, mapping):
+        self.fds = {}
+        self.dies = mapping.get("dies", [])
+        for path in mapping["packages"] + mapping["threads"] + [p for _, p in self.dies]:
+            if path and path not in self.fds:
+                try:
+                    self.fds[path] = os.open(path, os.O_RDONLY)
+                except OSError:
+                    pass
+        self.packages = [p for p in mapping["packages"] if p in self.fds]
+        self.threads = mapping["threads"]
+
+    def read_all(self):
+        """path -> °C for every open sensor."""
+        values = {}
+        for path, fd in self.fds.items():
+            try:
+                values[path] = int(os.pread(fd, 32, 0)) / 1000.0
+            except (OSError, ValueError):
+                pass
+        return values
+
+    def sample(self, n_threads):
+        """
+        (package °C, [°C per thread], [{"label", "temp"} per die]) with
+        n_threads thread entries. The package value is the hottest socket or
+        die, so a hot CCD is not averaged away by Tctl.
+        """
+        values = self.read_all()
+        # No package sensor: the hottest core stands in for it
+        package = max((values[p] for p in self.packages + [p for _, p in self.dies] if p in values), default=None)
+        if package is None:
+            package = max(values.values(), default=0)
+        temps = [values.get(path, package) if path else package for path in self.threads[:n_threads]]
+        temps.extend([package] * (n_threads - len(temps)))
+        dies = [{"label": label, "temp": values[path]} for label, path in self.dies if path in values]
+        return package, temps, dies
+
+    def close(self):
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds = {}
@@ -0,0 +1,41 @@
+"""
+Deadline-bounded background calls, for sources that can hang
+(nvidia-smi, statvfs on a dead network mount).
+"""
+import threading
+
+class SourceWorker:
+    """
+    One daemon thread per source, woken once per tick.
+    A hung source only ever blocks its own worker, and being a daemon
+    thread it never holds up interpreter exit in one-shot runs.
+    """
+
+    def __init__(self, name, fn):
+        self.fn = fn
+        self.result = None
+        self.error = None
+        self.request = threading.Event()
+        self.done = threading.Event()
+        self.done.set()
+        threading.Thread(target=self._run, name=f"sysmon-{name}", daemon=True).start()
+
+    def _run(self):
+        while True:
+            self.request.wait()
+            self.request.clear()
+            try:
+                self.result = self.fn()
+                self.error = None
+            except Exception as e:
+                self.error = e
+            self.done.set()
+
+    def kick(self):
+        """Starts a sample, unless the previous one is still stuck."""
+        if self.done.is_set():
+            self.done.clear()
+            self.request.set()
+
+    def wait(self, timeout):
+        return self.done.wait(max(0.0, timeout))
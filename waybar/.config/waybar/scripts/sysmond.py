@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Resident collector for the waybar modules.
+
+    sysmond.py [serve] [--interval N] [--max-interval M] [--no-alerts] [--profile]
+                                        sample once per tick, serve on a Unix socket
+    sysmond.py get <module>             print the latest JSON line (cpu, gpu, net, sysmon)
+    sysmond.py watch <module>           print a JSON line whenever it changes (waybar, no interval)
+
+cpu_info.py, gpu_info.py, net_info.py and sys_monitor.py also accept --daemon to read from
+here and fall back to sampling locally when the daemon is not running.
+Ticks come every N seconds (default 2) while the numbers move and back off
+to M (default 16) while they hold still; --max-interval N keeps a fixed tick.
+Threshold alerts (sysmon.alerts) run on the same snapshots unless --no-alerts.
+--profile (or SYSMON_PROFILE=1) adds per-source timings to every tooltip.
+"""
+import signal
+import sys
+
+from sysmon import client
+
+# Slowest tick while nothing moves (seconds)
+MAX_INTERVAL = 16.0
+
+def serve(interval, alerts=True, max_interval=MAX_INTERVAL):
+    from sysmon import daemon
+    import cpu_info
+    import gpu_info
+    import net_info
+    import sys_monitor
+    from sysmon.collector import Collector
+
+    renderers = {
+        "cpu": cpu_info.render,
+        "gpu": gpu_info.render,
+        "net": net_info.render,
+        "sysmon": sys_monitor.render,
+    }
+    observers = []
+    if alerts:
+        from sysmon.alerts import AlertEngine
+        observers.append(AlertEngine().feed)
+    try:
+        server = daemon.SnapshotServer(
+            client.socket_path(), Collector(resident=True, interval=interval, ring=True),
+            renderers, interval, observers, max_interval
+        )
+    except RuntimeError as e:
+        print(f"sysmond: {e}", file=sys.stderr)
+        sys.exit(1)
+    # Exit through serve()'s cleanup so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    args = sys.argv[1:]
+    interval = 2.0
+    if "--interval" in args:
+        i = args.index("--interval")
+        interval = float(args[i + 1])
+        del args[i:i + 2]
+    max_interval = max(interval, MAX_INTERVAL)
+    if "--max-interval" in args:
+        i = args.index("--max-interval")
+        max_interval = float(args[i + 1])
+        del args[i:i + 2]
+    alerts = "--no-alerts" not in args
+    if not alerts:
+        args.remove("--no-alerts")
+    if "--profile" in args:
+        args.remove("--profile")
+        from sysmon import profile
+        profile.enable()
+
+    cmd = args[0] if args else "serve"
+    if cmd == "serve":
+        serve(interval, alerts, max_interval)
+    elif cmd in ("get", "watch") and len(args) == 2:
+        if not client.relay(args[1], follow=cmd == "watch"):
+            print(f"sysmond: no daemon listening on {client.socket_path()}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        print(__doc__.strip(), file=sys.stderr)
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()